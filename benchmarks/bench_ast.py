@@ -0,0 +1,149 @@
+import argparse
+import gc
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from bench_lexer import ROOT, generate_program, extract_src
+
+
+def measure(src_dir: str, statements: int, repeat: int, arena: bool = False):
+    sys.path.insert(0, src_dir)
+    from Lexer import Lexer
+    from Parser import Parser
+    from Compiler import Compiler
+
+    program = generate_program(statements, integer_only=True)
+    tokens = Lexer(program, path="<bench>").make_tokens()
+
+    def parse():
+        kwargs = {}
+        if arena:
+            from Arena import ASTArena
+            kwargs["nodes"] = ASTArena()
+
+        return Parser(tokens, **kwargs).parse_program()
+
+    parse_time = compile_time = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        ast = parse()
+        parse_time = min(parse_time, time.perf_counter() - start)
+
+        start = time.perf_counter()
+        Compiler().compile(ast)
+        compile_time = min(compile_time, time.perf_counter() - start)
+        del ast
+
+    gc.collect()
+    tracemalloc.start()
+    ast = parse()
+    retained = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    return parse_time, compile_time, retained
+
+
+def count_nodes(statements: int) -> int:
+    from Lexer import Lexer
+    from Parser import Parser
+    from Arena import ASTArena
+
+    arena = ASTArena()
+    Parser(Lexer(generate_program(statements, integer_only=True)).make_tokens(), nodes=arena).parse_program()
+    return len(arena) + 1
+
+
+# Stress test: every phase must run under a small recursion limit and scale
+# linearly, so each shape is timed at depth/2 and depth
+def measure_depth(src_dir: str, depth: int):
+    sys.path.insert(0, src_dir)
+    from Lexer import Lexer
+    from Parser import Parser
+    from Compiler import Compiler
+    import json_writer
+
+    shapes = {
+        "left": lambda n: "1" + "+1" * n + ";",
+        "paren": lambda n: "(" * n + "1" + "+1)" * n + ";",
+        "pow": lambda n: "2^" * n + "2;",
+    }
+
+    sys.setrecursionlimit(200)
+
+    for shape, make_program in shapes.items():
+        timings = []
+        for n in (depth // 2, depth):
+            tokens = Lexer(make_program(n), path="<bench>").make_tokens()
+
+            start = time.perf_counter()
+            ast = Parser(tokens).parse_program()
+            parsed = time.perf_counter()
+
+            compiler = Compiler()
+            compiler.compile(ast)
+            str(compiler.module)
+            compiled = time.perf_counter()
+
+            # Indented output is quadratic in depth by construction
+            json_writer.dumps(ast.json(), indent=None)
+            done = time.perf_counter()
+
+            timings.append((parsed - start, compiled - parsed, done - compiled))
+
+        for n, (parse_time, compile_time, json_time) in zip((depth // 2, depth), timings):
+            print(f"{shape:<6} depth {n:>8}  parse {parse_time:7.3f} s  compile {compile_time:7.3f} s  "
+                  f"json {json_time:7.3f} s")
+
+        ratio = sum(timings[1]) / sum(timings[0])
+        print(f"{shape:<6} depth x2 -> time x{ratio:.2f}")
+
+
+def report(label: str, nodes: int, parse_time: float, compile_time: float, retained: int):
+    print(f"{label:<10} {nodes:>10} nodes  parse {parse_time:7.3f} s ({nodes / parse_time:>10,.0f} nodes/s)  "
+          f"compile {compile_time:7.3f} s  {retained / nodes:6.1f} B/node")
+
+
+def measure_revision(rev: str, statements: int, repeat: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        src = extract_src(rev, tmp)
+        out = subprocess.run(
+            [sys.executable, __file__, "--src", src, "--statements", str(statements), "--repeat", str(repeat), "--raw"],
+            check=True, capture_output=True, text=True).stdout
+        parse_time, compile_time, retained = out.split()
+        return float(parse_time), float(compile_time), int(retained)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure AST build time, memory and codegen time")
+    parser.add_argument("--statements", type=int, default=20_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--against", metavar="REV", help="also measure the node classes at this git revision")
+    parser.add_argument("--depth", type=int, help="only run the deep-expression stress test at this depth")
+    parser.add_argument("--src", default=os.path.join(ROOT, "src"), help=argparse.SUPPRESS)
+    parser.add_argument("--raw", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.raw:
+        print(*measure(args.src, args.statements, args.repeat))
+        return
+
+    if args.depth:
+        measure_depth(args.src, args.depth)
+        return
+
+    objects = measure(args.src, args.statements, args.repeat)
+    nodes = count_nodes(args.statements)
+
+    report("objects", nodes, *objects)
+    report("arena", nodes, *measure(args.src, args.statements, args.repeat, arena=True))
+    if args.against:
+        report(args.against, nodes, *measure_revision(args.against, args.statements, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+from bench_lexer import ROOT
+from generator import SHAPES, generate
+
+# What the single-character edits insert
+EDIT_CHARS = "0123456789+-*/^();. \n#@"
+
+
+def load(src_dir: str):
+    sys.path.insert(0, src_dir)
+    from Lexer import Lexer
+    from Parser import Parser
+    from Incremental import IncrementalDocument
+
+    return Lexer, Parser, IncrementalDocument
+
+
+# What a full re-lex and re-parse gives: tokens, AST and the diagnostics
+# Pipeline would report with stop_after="parse"
+def full_parse(modules, text: str) -> tuple:
+    Lexer, Parser, IncrementalDocument = modules
+
+    lexer = Lexer(text, "<bench>")
+    tokens = lexer.make_tokens()
+    parser = Parser(tokens)
+    program = parser.parse_program()
+
+    errors = lexer.error_handler.errors or parser.error_handler.errors
+    return tokens, program, [str(error) for error in errors]
+
+
+def same_as_full(modules, document) -> bool:
+    tokens, program, diagnostics = full_parse(modules, document.text)
+
+    return ([(token.type, token.literal, token.start, token.end) for token in tokens] ==
+            [(token.type, token.literal, token.start, token.end) for token in document.tokens()] and
+            program.json() == document.program().json() and
+            diagnostics == [str(error) for error in document.diagnostics().errors])
+
+
+# A random insertion or deletion of one character, as (offset, removed, inserted)
+def random_edit(rng: random.Random, length: int) -> tuple[int, int, str]:
+    if length and rng.random() < 0.5:
+        return rng.randrange(length), 1, ""
+    return rng.randint(0, length), 0, rng.choice(EDIT_CHARS)
+
+
+def percentile(samples: list[float], fraction: float) -> float:
+    return sorted(samples)[min(int(len(samples) * fraction), len(samples) - 1)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time single-character edits through IncrementalDocument")
+    parser.add_argument("--size", type=int, default=100_000, help="statements (lines) per program")
+    parser.add_argument("--shapes", nargs="+", choices=SHAPES, default=["statements", "errors", "syntax"])
+    parser.add_argument("--edits", type=int, default=1000)
+    parser.add_argument("--typing", action="store_true",
+                        help="edit at the same place every time, as when typing, instead of at random offsets")
+    parser.add_argument("--verify", type=int, default=100, metavar="N",
+                        help="compare with a full re-lex and re-parse every N edits (0 to never)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--src", default=os.path.join(ROOT, "src"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    modules = load(args.src)
+    IncrementalDocument = modules[2]
+
+    equivalent = True
+    print(f"{'shape':<11} {'lines':>7} {'full s':>7} {'open s':>7} {'median ms':>9} {'p95 ms':>7} {'max ms':>7} "
+          f"{'diag ms':>7} {'chars':>6} {'stmts':>5}  same")
+    for shape in args.shapes:
+        text = generate(shape, args.size, args.seed)
+        rng = random.Random(args.seed)
+
+        start = time.perf_counter()
+        full_parse(modules, text)
+        full_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        document = IncrementalDocument(text, "<bench>")
+        open_time = time.perf_counter() - start
+
+        latencies, diagnostics_times, relexed, reparsed = [], [], [], []
+        same = True
+        cursor = len(text) // 2
+
+        for i in range(1, args.edits + 1):
+            if args.typing:
+                offset, removed, inserted = cursor, 0, rng.choice(EDIT_CHARS)
+                cursor += 1
+            else:
+                offset, removed, inserted = random_edit(rng, len(document.text))
+
+            start = time.perf_counter()
+            chars, statements = document.edit(offset, removed, inserted)
+            latencies.append(time.perf_counter() - start)
+            relexed.append(chars)
+            reparsed.append(statements)
+
+            # Rendering resolves lines and columns
+            start = time.perf_counter()
+            [str(error) for error in document.diagnostics().errors[:10]]
+            diagnostics_times.append(time.perf_counter() - start)
+
+            if args.verify and i % args.verify == 0:
+                same = same and same_as_full(modules, document)
+
+        equivalent = equivalent and same
+        print(f"{shape:<11} {args.size:>7} {full_time:7.3f} {open_time:7.3f} "
+              f"{statistics.median(latencies) * 1000:9.3f} {percentile(latencies, 0.95) * 1000:7.3f} "
+              f"{max(latencies) * 1000:7.3f} {statistics.median(diagnostics_times) * 1000:7.3f} "
+              f"{statistics.median(relexed):6.0f} {statistics.median(reparsed):5.0f}  "
+              f"{('yes' if same else 'NO') if args.verify else '-'}")
+
+    if not equivalent:
+        sys.exit("incremental results differ from a full re-lex and re-parse")
+
+
+if __name__ == "__main__":
+    main()
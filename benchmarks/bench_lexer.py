@@ -0,0 +1,139 @@
+import argparse
+import gc
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+# integer_only restricts the program to what Compiler can lower (int + - * /)
+def generate_program(statements: int, seed: int = 0, integer_only: bool = False) -> str:
+    rng = random.Random(seed)
+    ops = "+-*/" if integer_only else "+-*/^"
+    lines = []
+
+    for i in range(statements):
+        terms = []
+        for _ in range(rng.randint(2, 8)):
+            term = str(rng.randint(0, 100000)) if integer_only or rng.random() < 0.7 else f"{rng.random() * 1000:.3f}"
+            if rng.random() < 0.2:
+                term = f"({term} {rng.choice(ops)} {rng.randint(1, 99)})"
+            terms.append(term)
+
+        line = f" {rng.choice(ops)} ".join(terms) + ";"
+        if i % 10 == 0:
+            line += "    # generated statement"
+        lines.append(line)
+
+    return "\n".join(lines) + "\n"
+
+
+def measure(src_dir: str, statements: int, repeat: int, mode: str = "list"):
+    sys.path.insert(0, src_dir)
+    from Lexer import Lexer
+
+    program = generate_program(statements)
+
+    with tempfile.NamedTemporaryFile("w", suffix=".kitty", delete=False) as f:
+        f.write(program)
+
+    def lex():
+        if mode == "read":
+            with open(f.name) as file:
+                return Lexer(file.read(), path="<bench>").make_token_buffer()
+
+        if mode == "mmap":
+            from Lexer import MappedLexer
+            return MappedLexer(f.name).make_token_buffer()
+
+        if mode == "stream":
+            from Lexer import StreamLexer
+
+            # Tokens are dropped as soon as they are counted, like a parser would
+            with open(f.name) as file:
+                return [sum(1 for _ in StreamLexer(file, path="<bench>"))]
+
+        lexer = Lexer(program, path="<bench>")
+        return lexer.make_token_buffer() if mode == "buffer" else lexer.make_tokens()
+
+    best = float("inf")
+    token_count = 0
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        tokens = lex()
+        best = min(best, time.perf_counter() - start)
+        token_count = tokens[0] if mode == "stream" else len(tokens)
+        del tokens
+
+    gc.collect()
+    tracemalloc.start()
+    tokens = lex()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del tokens
+    os.unlink(f.name)
+
+    return len(program), token_count, best, retained, peak
+
+
+def report(label: str, size: int, token_count: int, seconds: float, retained: int, peak: int):
+    print(f"{label:<12} {size / 1e6:8.2f} MB {token_count:>10} tokens {seconds:8.3f} s "
+          f"{token_count / seconds:>12,.0f} tokens/s "
+          f"{retained / token_count:8.1f} B/token (peak {peak / token_count:.1f})")
+
+
+def extract_src(rev: str, dest: str) -> str:
+    archive = subprocess.run(["git", "-C", ROOT, "archive", rev, "src"], check=True, capture_output=True).stdout
+    subprocess.run(["tar", "-x", "-C", dest], input=archive, check=True)
+    return os.path.join(dest, "src")
+
+
+def measure_revision(rev: str, statements: int, repeat: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        extract_src(rev, tmp)
+
+        out = subprocess.run(
+            [sys.executable, __file__, "--src", os.path.join(tmp, "src"), "--statements", str(statements),
+             "--repeat", str(repeat), "--raw"],
+            check=True, capture_output=True, text=True).stdout
+        size, token_count, seconds, retained, peak = out.split()
+        return int(size), int(token_count), float(seconds), int(retained), int(peak)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure Lexer.make_tokens throughput")
+    parser.add_argument("--statements", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--buffer", action="store_true", help="also measure the TokenBuffer representation")
+    parser.add_argument("--stream", action="store_true", help="also measure StreamLexer reading from a file")
+    parser.add_argument("--mmap", action="store_true",
+                        help="also measure MappedLexer against reading the file into a str, both into a TokenBuffer")
+    parser.add_argument("--against", metavar="REV", help="also measure the lexer at this git revision")
+    parser.add_argument("--src", default=os.path.join(ROOT, "src"), help=argparse.SUPPRESS)
+    parser.add_argument("--raw", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.raw:
+        print(*measure(args.src, args.statements, args.repeat))
+        return
+
+    report("current", *measure(args.src, args.statements, args.repeat))
+    if args.buffer:
+        report("buffer", *measure(args.src, args.statements, args.repeat, mode="buffer"))
+    if args.stream:
+        report("stream", *measure(args.src, args.statements, args.repeat, mode="stream"))
+    if args.mmap:
+        report("read", *measure(args.src, args.statements, args.repeat, mode="read"))
+        report("mmap", *measure(args.src, args.statements, args.repeat, mode="mmap"))
+    if args.against:
+        report(args.against, *measure_revision(args.against, args.statements, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+import argparse
+import os
+import sys
+import time
+
+from bench_lexer import ROOT
+from generator import SHAPES, generate
+
+
+def load(src_dir: str):
+    sys.path.insert(0, src_dir)
+    from Lexer import Lexer
+    from Parser import Parser
+    from Arena import ASTArena
+    import ParallelLexer
+    import ParallelParser
+
+    return Lexer, Parser, ASTArena, ParallelLexer, ParallelParser
+
+
+def best_of(fn, repeat: int):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def token_columns(tokens) -> tuple:
+    return (tokens.types.tobytes(), tokens.starts.tobytes(), tokens.ends.tobytes(), tokens.literals.tobytes(),
+            tokens.literal_table)
+
+
+def arena_columns(arena) -> tuple:
+    return (arena.kinds.tobytes(), arena.operators.tobytes(), arena.lefts.tobytes(), arena.rights.tobytes(),
+            arena.offsets.tobytes(), arena.statements.tobytes(), arena.constants)
+
+
+def diagnostics(stage) -> list[str]:
+    return [str(error) for error in stage.error_handler.errors]
+
+
+# Times the serial and the parallel lexer and parser on one program and
+# checks that the parallel ones produce the same tokens, AST and diagnostics
+def compare(modules, program: str, jobs: int, repeat: int) -> list[tuple]:
+    Lexer, Parser, ASTArena, ParallelLexer, ParallelParser = modules
+
+    def lex(lexer):
+        return lexer, lexer.make_token_buffer()
+
+    serial_time, (serial_lexer, tokens) = best_of(lambda: lex(Lexer(program, "<bench>")), repeat)
+    parallel_time, (parallel_lexer, parallel_tokens) = best_of(
+        lambda: lex(ParallelLexer.ParallelLexer(program, "<bench>", jobs=jobs)), repeat)
+
+    lex_row = ("lex", len(tokens), serial_time, parallel_time,
+               token_columns(tokens) == token_columns(parallel_tokens) and
+               diagnostics(serial_lexer) == diagnostics(parallel_lexer))
+
+    def parse(parser):
+        return parser, parser.parse_program()
+
+    serial_time, (serial_parser, ast) = best_of(lambda: parse(Parser(tokens, nodes=ASTArena())), repeat)
+    parallel_time, (parallel_parser, parallel_ast) = best_of(
+        lambda: parse(ParallelParser.ParallelParser(tokens, jobs=jobs)), repeat)
+
+    parse_row = ("parse", len(tokens), serial_time, parallel_time,
+                 arena_columns(ast) == arena_columns(parallel_ast) and
+                 diagnostics(serial_parser) == diagnostics(parallel_parser))
+
+    return [lex_row, parse_row]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the parallel lexer and parser with the serial ones")
+    parser.add_argument("--size", type=int, default=200_000,
+                        help="statements, terms, nesting depth or operators, depending on shape")
+    parser.add_argument("--shapes", nargs="+", choices=SHAPES, default=["statements", "errors", "syntax"])
+    parser.add_argument("--jobs", type=int, nargs="+", default=[os.cpu_count()])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--src", default=os.path.join(ROOT, "src"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    modules = load(args.src)
+    # Small inputs would be handled serially
+    modules[3].MIN_PARALLEL_SIZE = modules[4].MIN_PARALLEL_TOKENS = 0
+
+    equivalent = True
+    print(f"{'shape':<11} {'stage':<6} {'jobs':>4} {'tokens':>10} {'serial s':>9} {'parallel s':>10} {'speedup':>8}  same")
+    for shape in args.shapes:
+        # A trailing comment without a newline, the one case where EOF is not at len(program)
+        program = generate(shape, args.size) + "1; # no newline"
+
+        for jobs in args.jobs:
+            for stage, tokens, serial_time, parallel_time, same in compare(modules, program, jobs, args.repeat):
+                equivalent = equivalent and same
+                print(f"{shape:<11} {stage:<6} {jobs:>4} {tokens:>10} {serial_time:9.3f} {parallel_time:10.3f} "
+                      f"{serial_time / parallel_time:7.2f}x  {'yes' if same else 'NO'}")
+
+    if not equivalent:
+        sys.exit("parallel results differ from the serial ones")
+
+
+if __name__ == "__main__":
+    main()
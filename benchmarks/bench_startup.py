@@ -0,0 +1,75 @@
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from bench_lexer import ROOT
+
+MODES = {
+    "check": ["--check"],
+    "tokens": ["--tokens"],
+    "ast": ["--ast"],
+    "compile": [],
+}
+
+
+# Sums the self times python -X importtime reports on stderr
+def import_time(stderr: str) -> tuple[int, bool]:
+    total = 0
+    llvmlite = False
+
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+
+        self_us, _, name = line[len("import time:"):].split("|")
+        total += int(self_us)
+        llvmlite = llvmlite or name.strip().startswith("llvmlite")
+
+    return total, llvmlite
+
+
+def measure(main_py: str, path: str, args: list[str], repeat: int):
+    best_wall = best_imports = float("inf")
+    llvmlite = False
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = subprocess.run([sys.executable, "-X", "importtime", main_py, "--no-cache", *args, path],
+                                capture_output=True, text=True)
+        wall = time.perf_counter() - start
+
+        if result.returncode != 0:
+            raise RuntimeError(result.stdout + result.stderr)
+
+        imports, llvmlite = import_time(result.stderr)
+        best_wall = min(best_wall, wall)
+        best_imports = min(best_imports, imports)
+
+    return best_wall, best_imports, llvmlite
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure driver startup time per mode with python -X importtime")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--src", default=os.path.join(ROOT, "src"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    main_py = os.path.join(args.src, "main.py")
+
+    with tempfile.NamedTemporaryFile("w", suffix=".kitty", delete=False) as f:
+        f.write("(1 + 2) * 3;\n4 - 5 / 6;\n")
+
+    try:
+        print(f"{'mode':<8} {'wall ms':>9} {'imports ms':>11}  llvmlite")
+        for mode, mode_args in MODES.items():
+            wall, imports, llvmlite = measure(main_py, f.name, mode_args, args.repeat)
+            print(f"{mode:<8} {wall * 1000:9.1f} {imports / 1000:11.1f}  {'loaded' if llvmlite else 'not loaded'}")
+    finally:
+        os.unlink(f.name)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+import argparse
+import gc
+import json
+import os
+import subprocess
+import sys
+import time
+import tracemalloc
+
+from bench_lexer import ROOT
+from generator import SHAPES, generate
+
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+
+STAGES = ("lex", "parse", "codegen", "end-to-end")
+
+
+def load_stages(src_dir: str):
+    sys.path.insert(0, src_dir)
+    from Lexer import Lexer
+    from Parser import Parser
+    from ConstantFolder import ConstantFolder
+    from Compiler import Compiler
+    from Optimizer import Optimizer
+
+    def lex(program):
+        return Lexer(program, path="<bench>").make_token_buffer()
+
+    def parse(tokens):
+        return Parser(tokens).parse_program()
+
+    def codegen(ast):
+        compiler = Compiler()
+        compiler.compile(ast)
+        return str(compiler.module)
+
+    optimizer = Optimizer("2")
+
+    # What the driver does without dumps or cache, stopping where it would
+    # report errors
+    def end_to_end(program):
+        lexer = Lexer(program, path="<bench>")
+        tokens = lexer.make_token_buffer()
+        if lexer.error_handler.has_error:
+            return
+
+        parser = Parser(tokens, lexer.error_handler)
+        ast = parser.parse_program()
+        if parser.error_handler.has_error:
+            return
+
+        ast = ConstantFolder(parser.error_handler).fold(ast)
+        if parser.error_handler.has_error:
+            return
+
+        optimizer.run_passes(optimizer.parse(codegen(ast)))
+
+    return lex, parse, codegen, end_to_end
+
+
+def timed(fn, arg, repeat: int):
+    best = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        result = fn(arg)
+        best = min(best, time.perf_counter() - start)
+        del result
+
+    gc.collect()
+    tracemalloc.start()
+    fn(arg)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {"seconds": best, "peak": peak}
+
+
+# Measures every stage on one generated program. A stage that raises on the
+# shape is recorded with the exception name instead of a timing.
+def measure(stages, shape: str, size: int, repeat: int) -> dict:
+    lex, parse, codegen, end_to_end = stages
+
+    program = generate(shape, size)
+    tokens = lex(program)
+    ast = parse(tokens)
+
+    result = {"bytes": len(program), "tokens": len(tokens), "stages": {}}
+    for stage, fn, arg in (("lex", lex, program), ("parse", parse, tokens), ("codegen", codegen, ast),
+                           ("end-to-end", end_to_end, program)):
+        try:
+            result["stages"][stage] = timed(fn, arg, repeat)
+        except Exception as e:
+            result["stages"][stage] = {"error": type(e).__name__}
+
+    return result
+
+
+def current_label() -> str:
+    return subprocess.run(["git", "-C", ROOT, "describe", "--always", "--dirty"],
+                          check=True, capture_output=True, text=True).stdout.strip()
+
+
+def report(results: dict, baseline: dict = None):
+    print(f"{'shape':<11} {'stage':<11} {'seconds':>9} {'MB/s':>8} {'tokens/s':>12} {'peak MB':>8}"
+          + ("  vs baseline" if baseline else ""))
+
+    for shape, result in results["shapes"].items():
+        for stage in STAGES:
+            entry = result["stages"][stage]
+            if "error" in entry:
+                print(f"{shape:<11} {stage:<11} {entry['error']:>9}")
+                continue
+
+            seconds = entry["seconds"]
+            line = (f"{shape:<11} {stage:<11} {seconds:9.4f} {result['bytes'] / seconds / 1e6:8.2f} "
+                    f"{result['tokens'] / seconds:12,.0f} {entry['peak'] / 1e6:8.2f}")
+
+            before = (baseline or {}).get("shapes", {}).get(shape, {}).get("stages", {}).get(stage, {})
+            if "seconds" in before:
+                line += (f"  {(seconds / before['seconds'] - 1) * 100:+6.1f}% time "
+                         f"{(entry['peak'] / before['peak'] - 1) * 100:+6.1f}% peak")
+            print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark every compiler stage on synthetic programs")
+    parser.add_argument("--size", type=int, default=20_000,
+                        help="statements, terms, nesting depth or operators, depending on shape")
+    parser.add_argument("--shapes", nargs="+", choices=SHAPES, default=list(SHAPES))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--label", help="name to store the results under (default: git describe)")
+    parser.add_argument("--compare", metavar="LABEL", help="compare against results stored under LABEL")
+    parser.add_argument("--no-save", dest="save", action="store_false")
+    parser.add_argument("--src", default=os.path.join(ROOT, "src"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    stages = load_stages(args.src)
+    results = {
+        "label": args.label or current_label(),
+        "size": args.size,
+        "repeat": args.repeat,
+        "shapes": {shape: measure(stages, shape, args.size, args.repeat) for shape in args.shapes}
+    }
+
+    baseline = None
+    if args.compare:
+        with open(os.path.join(RESULTS_DIR, f"{args.compare}.json")) as f:
+            baseline = json.load(f)
+        if baseline["size"] != args.size:
+            print(f"warning: {args.compare} was measured with --size {baseline['size']}")
+
+    report(results, baseline)
+
+    if args.save:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        path = os.path.join(RESULTS_DIR, f"{results['label']}.json")
+        with open(path, "w") as f:
+            json.dump(results, f, indent=4)
+        print(f"Results written to {os.path.relpath(path, ROOT)}")
+
+
+if __name__ == "__main__":
+    main()
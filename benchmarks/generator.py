@@ -0,0 +1,83 @@
+import argparse
+import random
+import sys
+
+from bench_lexer import generate_program
+
+# Lines of tests/test.kitty, each with a different lexical or syntax error
+ERROR_LINES = (
+    "1.2.3 + 4;  # Multiple decimal points",
+    "5 + );      # Missing left operand",
+    "(6 * 7;     # Missing closing parenthesis",
+    "8 @ 9;      # Invalid operator",
+    "10 + ;      # Missing right operand",
+)
+
+SYNTAX_ERROR_LINES = ERROR_LINES[1:3] + ERROR_LINES[4:]
+
+
+# Many short statements, integer only so every phase up to codegen runs
+def many_statements(size: int, rng: random.Random) -> str:
+    return generate_program(size, seed=rng.randrange(1 << 32), integer_only=True)
+
+
+# A single expression of size terms
+def flat_expression(size: int, rng: random.Random) -> str:
+    terms = [str(rng.randint(1, 99)) for _ in range(size)]
+    operators = [rng.choice("+-*") for _ in range(size - 1)]
+    return "".join(term + " " + operator + " " for term, operator in zip(terms, operators)) + terms[-1] + ";\n"
+
+
+# size levels of parentheses around a sum
+def nested_parentheses(size: int, rng: random.Random) -> str:
+    return "(" * size + "1" + "".join(f" + {rng.randint(1, 9)})" for _ in range(size)) + ";\n"
+
+
+# A right-associative ^ chain of size operators
+def pow_chain(size: int, rng: random.Random) -> str:
+    return "".join(f"{rng.randint(1, 9)} ^ " for _ in range(size)) + "2;\n"
+
+
+# Every other statement is one of the broken lines of tests/test.kitty
+def error_heavy(size: int, rng: random.Random) -> str:
+    lines = []
+    for i in range(size):
+        lines.append(rng.choice(ERROR_LINES) if i % 2 else f"{rng.randint(0, 999)} + {rng.randint(0, 999)};")
+    return "\n".join(lines) + "\n"
+
+
+# Like error_heavy, but only with the syntax errors, so the lexer succeeds
+# and the parser recovers from every broken statement
+def syntax_errors(size: int, rng: random.Random) -> str:
+    lines = []
+    for i in range(size):
+        lines.append(rng.choice(SYNTAX_ERROR_LINES) if i % 2 else f"{rng.randint(0, 999)} + {rng.randint(0, 999)};")
+    return "\n".join(lines) + "\n"
+
+
+SHAPES = {
+    "statements": many_statements,
+    "flat": flat_expression,
+    "parens": nested_parentheses,
+    "pow": pow_chain,
+    "errors": error_heavy,
+    "syntax": syntax_errors,
+}
+
+
+def generate(shape: str, size: int, seed: int = 0) -> str:
+    return SHAPES[shape](size, random.Random(seed))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a synthetic kitty program to stdout")
+    parser.add_argument("shape", choices=SHAPES)
+    parser.add_argument("size", type=int, help="statements, terms, nesting depth or operators, depending on shape")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    sys.stdout.write(generate(args.shape, args.size, args.seed))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+import os
+import shutil
+import subprocess
+import time
+
+import llvmlite.binding as llvm
+
+from Optimizer import create_target_machine
+
+LINKER = os.environ.get("CC") or "cc"
+
+
+# Ahead-of-time backend: writes the module as a native object file and can
+# link it into a shared library exporting main with the system linker
+class AOT:
+    def __init__(self, speed_level: int = 2, cpu: str = "", features: str = ""):
+        # Position independent, so the object can go into a shared library
+        self.target_machine = create_target_machine(speed_level, cpu, features, reloc="pic")
+
+        # Seconds spent in each stage, in order
+        self.timings: dict[str, float] = {}
+
+    def object_code(self, llvm_module: llvm.ModuleRef) -> bytes:
+        start = time.perf_counter()
+        data = self.target_machine.emit_object(llvm_module)
+        self.timings["emit"] = time.perf_counter() - start
+
+        return data
+
+    def emit_object(self, llvm_module: llvm.ModuleRef, path: str):
+        data = self.object_code(llvm_module)
+        with open(path, "wb") as f:
+            f.write(data)
+
+    def link_shared(self, object_path: str, path: str):
+        if shutil.which(LINKER) is None:
+            raise RuntimeError(f"Linker not found: {LINKER}")
+
+        start = time.perf_counter()
+
+        result = subprocess.run([LINKER, "-shared", "-o", path, object_path], capture_output=True, text=True)
+        if result.returncode != 0:
+            raise RuntimeError(f"Linking {path} failed:\n{result.stderr}")
+
+        self.timings["link"] = time.perf_counter() - start
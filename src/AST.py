@@ -1,5 +1,7 @@
 from enum import Enum
 
+from Token import Token
+
 
 class NodeType(Enum):
     Program = "Program"
@@ -10,90 +12,132 @@ class NodeType(Enum):
 
 
 class Node:
+    __slots__ = ()
+
+    node_type: NodeType = None
+
     def type(self):
-        pass
+        return self.node_type
 
+    # Builds the JSON dict top-down with an explicit stack: every node fills
+    # in its own fields and queues (child, dict) pairs for its children
     def json(self):
+        root = {}
+        pending = [(self, root)]
+
+        while pending:
+            node, out = pending.pop()
+            node.fill_json(out, pending)
+
+        return root
+
+    def fill_json(self, out: dict, pending: list):
         pass
 
 
 class Statement(Node):
-    pass
+    __slots__ = ()
 
 
 class Expression(Node):
-    pass
+    __slots__ = ()
 
 
 class Program(Node):
+    __slots__ = ("statements",)
+
+    node_type = NodeType.Program
+
     def __init__(self):
         self.statements = []
     
-    def type(self):
-        return NodeType.Program
-    
-    def json(self):
-        return {
-            "type": self.type().value,
-            "statements": [{stmt.type().value: stmt.json()} for stmt in self.statements]
-        }
+    def fill_json(self, out: dict, pending: list):
+        out["type"] = self.type().value
+        out["statements"] = statements = []
+
+        for stmt in self.statements:
+            stmt_json = {}
+            statements.append({stmt.type().value: stmt_json})
+            pending.append((stmt, stmt_json))
 
 
 class ExpressionStatement(Statement):
+    __slots__ = ("expr",)
+
+    node_type = NodeType.ExpressionStatement
+
     def __init__(self, expr: Expression = None):
         self.expr = expr
 
-    def type(self):
-        return NodeType.ExpressionStatement
-
-    def json(self):
-        return {
-            "type": self.type().value,
-            "expr": self.expr.json()
-        }
+    def fill_json(self, out: dict, pending: list):
+        out["type"] = self.type().value
+        out["expr"] = expr_json = {}
+        pending.append((self.expr, expr_json))
 
 
 class InfixExpression(Expression):
-    def __init__(self, left_node: Expression, operator: str, right_node: Expression = None):
+    __slots__ = ("left_node", "operator", "right_node", "token")
+
+    node_type = NodeType.InfixExpression
+
+    # token is the operator token, used to point diagnostics at the expression
+    def __init__(self, left_node: Expression, operator: str, right_node: Expression = None, token: Token = None):
         self.left_node: Expression = left_node
         self.operator: str = operator
         self.right_node: Expression = right_node
+        self.token: Token = token
 
-    def type(self):
-        return NodeType.InfixExpression
-
-    def json(self):
-        return {
-            "type": self.type().value,
-            "left_node": self.left_node.json(),
-            "operator": self.operator,
-            "right_node": self.right_node.json()
-        }
+    def fill_json(self, out: dict, pending: list):
+        out["type"] = self.type().value
+        out["left_node"] = left_json = {}
+        out["operator"] = self.operator
+        out["right_node"] = right_json = {}
+        pending.append((self.right_node, right_json))
+        pending.append((self.left_node, left_json))
 
 
 class IntegerLiteral(Expression):
+    __slots__ = ("value",)
+
+    node_type = NodeType.IntegerLiteral
+
     def __init__(self, value):
         self.value = value
     
-    def type(self):
-        return NodeType.IntegerLiteral
-    
-    def json(self):
-        return {
-            "type": self.type().value,
-            "value": self.value
-        }
+    def fill_json(self, out: dict, pending: list):
+        out["type"] = self.type().value
+        out["value"] = self.value
 
 
 class FloatLiteral(Expression):
+    __slots__ = ("value",)
+
+    node_type = NodeType.FloatLiteral
+
     def __init__(self, value):
         self.value = value
     
-    def type(self):
-        return NodeType.FloatLiteral
-    
-    def json(self):
-        return {
-            "type": self.type().value,
-            "value": self.value
-        }
\ No newline at end of file
+    def fill_json(self, out: dict, pending: list):
+        out["type"] = self.type().value
+        out["value"] = self.value
+
+
+# Used by Parser to build the tree; ASTArena offers the same methods
+class NodeFactory:
+    def program(self):
+        return Program()
+
+    def add_statement(self, program: Program, stmt: Statement):
+        program.statements.append(stmt)
+
+    def expression_statement(self, expr: Expression):
+        return ExpressionStatement(expr)
+
+    def infix_expression(self, left_node: Expression, operator: str, right_node: Expression, token: Token = None):
+        return InfixExpression(left_node, operator, right_node, token)
+
+    def integer_literal(self, value):
+        return IntegerLiteral(value)
+
+    def float_literal(self, value):
+        return FloatLiteral(value)
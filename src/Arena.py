@@ -0,0 +1,153 @@
+from array import array
+
+from AST import NodeType
+from Token import Token
+from Position import Position
+
+NODE_TYPES = tuple(NodeType)
+NODE_TYPE_CODES = {node_type: code for code, node_type in enumerate(NODE_TYPES)}
+
+OPERATORS = ("+", "-", "*", "/", "^")
+OPERATOR_CODES = {operator: code for code, operator in enumerate(OPERATORS)}
+
+NO_NODE = -1
+
+# Rows of these kinds refer to the constants list rather than to other rows
+LITERAL_CODES = (NODE_TYPE_CODES[NodeType.IntegerLiteral], NODE_TYPE_CODES[NodeType.FloatLiteral])
+
+
+# Flat AST: every node is a row in parallel typed arrays and refers to its
+# children by row index. Literal values live in the constants list.
+#   ExpressionStatement: left = expression row
+#   InfixExpression:     left, right = operand rows, operator = OPERATORS index,
+#                        offset = start of the operator token in source
+#   Integer/FloatLiteral: left = constants index
+# The arena itself is the Program node; statements holds the statement rows.
+# It provides the NodeFactory methods, so Parser can build it directly.
+class ASTArena:
+    def __init__(self):
+        self.kinds = array("B")
+        self.operators = array("B")
+        self.lefts = array("q")
+        self.rights = array("q")
+        self.offsets = array("q")
+        self.source = None
+
+        self.constants = []
+        self.statements = array("q")
+
+    def type(self):
+        return NodeType.Program
+
+    def add_node(self, node_type: NodeType, left: int, right: int = NO_NODE, operator: int = 0,
+                 offset: int = -1) -> int:
+        self.kinds.append(NODE_TYPE_CODES[node_type])
+        self.operators.append(operator)
+        self.lefts.append(left)
+        self.rights.append(right)
+        self.offsets.append(offset)
+        return len(self.kinds) - 1
+
+    def add_constant(self, node_type: NodeType, value) -> int:
+        self.constants.append(value)
+        return self.add_node(node_type, len(self.constants) - 1)
+
+    # NodeFactory interface
+    def program(self):
+        return self
+
+    def add_statement(self, program, stmt: int):
+        self.statements.append(stmt)
+
+    # Appends the rows of another arena, with its row and constant indices
+    # shifted past the ones already here
+    def extend(self, other: "ASTArena"):
+        rows = len(self.kinds)
+        constants = len(self.constants)
+
+        self.lefts.extend(array("q", [left + (constants if kind in LITERAL_CODES else rows)
+                                      for kind, left in zip(other.kinds, other.lefts)]))
+        self.rights.extend(array("q", [right if right == NO_NODE else right + rows for right in other.rights]))
+        self.kinds.extend(other.kinds)
+        self.operators.extend(other.operators)
+        self.offsets.extend(other.offsets)
+
+        self.constants.extend(other.constants)
+        self.statements.extend(array("q", [stmt + rows for stmt in other.statements]))
+
+        if other.source is not None:
+            self.source = other.source
+
+    def expression_statement(self, expr: int) -> int:
+        return self.add_node(NodeType.ExpressionStatement, expr)
+
+    def infix_expression(self, left_node: int, operator: str, right_node: int, token: Token = None) -> int:
+        if token is None:
+            return self.add_node(NodeType.InfixExpression, left_node, right_node, OPERATOR_CODES[operator])
+
+        self.source = token.source
+        return self.add_node(NodeType.InfixExpression, left_node, right_node, OPERATOR_CODES[operator], token.start)
+
+    def integer_literal(self, value) -> int:
+        return self.add_constant(NodeType.IntegerLiteral, value)
+
+    def float_literal(self, value) -> int:
+        return self.add_constant(NodeType.FloatLiteral, value)
+
+    # Row accessors
+    def kind(self, row: int) -> NodeType:
+        return NODE_TYPES[self.kinds[row]]
+
+    def operator(self, row: int) -> str:
+        return OPERATORS[self.operators[row]]
+
+    def value(self, row: int):
+        return self.constants[self.lefts[row]]
+
+    # Source span of an infix row's operator, or (None, None) if not recorded
+    def positions(self, row: int) -> tuple[Position, Position]:
+        offset = self.offsets[row]
+        if offset < 0:
+            return None, None
+        return Position(offset, self.source), Position(offset + 1, self.source)
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def nbytes(self) -> int:
+        return sum(column.itemsize * len(column)
+                   for column in (self.kinds, self.operators, self.lefts, self.rights, self.offsets, self.statements))
+
+    # Same output as Program.json, built top-down with an explicit stack
+    def json(self):
+        statements = []
+        pending = []
+
+        for stmt in self.statements:
+            stmt_json = {}
+            statements.append({NodeType.ExpressionStatement.value: stmt_json})
+            pending.append((stmt, stmt_json))
+
+        while pending:
+            row, out = pending.pop()
+            kind = self.kind(row)
+            out["type"] = kind.value
+
+            if kind == NodeType.ExpressionStatement:
+                out["expr"] = expr_json = {}
+                pending.append((self.lefts[row], expr_json))
+
+            elif kind == NodeType.InfixExpression:
+                out["left_node"] = left_json = {}
+                out["operator"] = self.operator(row)
+                out["right_node"] = right_json = {}
+                pending.append((self.rights[row], right_json))
+                pending.append((self.lefts[row], left_json))
+
+            else:
+                out["value"] = self.value(row)
+
+        return {
+            "type": NodeType.Program.value,
+            "statements": statements
+        }
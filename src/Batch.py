@@ -0,0 +1,125 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+from Pipeline import Pipeline, CompileOptions
+
+# Pipeline of the current worker process, set up by init_worker
+_pipeline = None
+
+
+# Files and directories (searched recursively for .kitty files) in a
+# deterministic order
+def collect_files(paths: list[str]) -> list[str]:
+    files = []
+    for path in paths:
+        if not os.path.isdir(path):
+            files.append(path)
+            continue
+
+        for root, dirs, names in os.walk(path):
+            dirs.sort()
+            files.extend(os.path.join(root, name) for name in sorted(names) if name.endswith(".kitty"))
+
+    return files
+
+
+# What a worker sends back for one file. Diagnostics are rendered in the
+# worker, as they hold the source they point into.
+class FileReport:
+    def __init__(self, path: str, size: int, seconds: float, failed_stage: str, errors: list[str],
+                 warnings: list[str]):
+        self.path = path
+        self.size = size
+        self.seconds = seconds
+        self.failed_stage = failed_stage
+        self.errors = errors
+        self.warnings = warnings
+
+
+def init_worker(options: CompileOptions):
+    global _pipeline
+    _pipeline = Pipeline(options)
+
+
+def compile_one(path: str, out_dir: str = None) -> FileReport:
+    start = time.perf_counter()
+    try:
+        result = _pipeline.compile_file(path)
+        size = os.path.getsize(path)
+    except (OSError, UnicodeDecodeError) as e:
+        # Reported like a failed stage, so the rest of the batch still runs
+        return FileReport(path, 0, time.perf_counter() - start, "read", [f"Read Error: {e}"], [])
+    seconds = time.perf_counter() - start
+
+    if out_dir and result.ir is not None:
+        # Mirrors the file's path relative to the working directory
+        relative = os.path.relpath(path)
+        if relative.startswith(".."):
+            relative = os.path.basename(path)
+
+        out_path = os.path.join(out_dir, os.path.splitext(relative)[0] + ".ll")
+        os.makedirs(os.path.dirname(out_path), exist_ok=True)
+        with open(out_path, "w") as f:
+            f.write(result.ir)
+
+    file_report = FileReport(path, size, seconds, result.failed_stage,
+                             [str(error) for error in result.diagnostics.errors],
+                             [str(warning) for warning in result.diagnostics.warnings])
+    result.close()
+    return file_report
+
+
+# Compiles many files on a pool of worker processes, one per core by
+# default. Each worker keeps its own Pipeline; reports come back in the
+# order of the files.
+class BatchCompiler:
+    def __init__(self, options: CompileOptions = None, jobs: int = None, out_dir: str = None):
+        self.options = options if options else CompileOptions()
+        if jobs is not None and (type(jobs) is not int or jobs < 1):
+            raise ValueError(f"jobs must be a positive integer or None, got {jobs!r}")
+        self.jobs = jobs if jobs is not None else os.cpu_count()
+        self.out_dir = out_dir
+
+    def compile(self, paths: list[str]) -> list[FileReport]:
+        files = collect_files(paths)
+
+        if self.jobs == 1 or len(files) == 1:
+            init_worker(self.options)
+            return [compile_one(path, self.out_dir) for path in files]
+
+        # Several files per task, so small files do not cost a round trip each
+        chunksize = max(1, len(files) // (self.jobs * 4))
+
+        with ProcessPoolExecutor(self.jobs, initializer=init_worker, initargs=(self.options,)) as executor:
+            return list(executor.map(compile_one, files, repeat(self.out_dir), chunksize=chunksize))
+
+
+def print_report(reports: list[FileReport], wall: float):
+    for file_report in reports:
+        if not file_report.errors and not file_report.warnings:
+            continue
+
+        print(f"===== {file_report.path} =====")
+        if file_report.warnings:
+            print("\nWarnings:")
+            for warning in file_report.warnings:
+                print(f" {warning}")
+
+        if file_report.errors:
+            print("\nErrors:")
+            for error in file_report.errors:
+                print(f" {error}")
+        print()
+
+    print(f"{'file':<40} {'status':<12} {'KiB':>8} {'ms':>9} {'MB/s':>8}")
+    for file_report in reports:
+        status = f"{file_report.failed_stage} error" if file_report.failed_stage else "ok"
+        print(f"{file_report.path[-40:]:<40} {status:<12} {file_report.size / 1024:8.1f} "
+              f"{file_report.seconds * 1000:9.3f} {file_report.size / max(file_report.seconds, 1e-9) / 1e6:8.2f}")
+
+    size = sum(file_report.size for file_report in reports)
+    failed = sum(1 for file_report in reports if file_report.failed_stage)
+    print(f"{len(reports)} files ({failed} failed), {size / 1e6:.2f} MB in {wall:.3f} s: "
+          f"{len(reports) / wall:,.1f} files/s, {size / wall / 1e6:.2f} MB/s")
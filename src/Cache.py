@@ -0,0 +1,145 @@
+import hashlib
+import os
+import tempfile
+
+SOURCE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+CACHE_DIR = os.environ.get("KITTY_CACHE_DIR") or os.path.join(os.path.expanduser("~"), ".cache", "kitty")
+CACHE_SIZE = 256 << 20
+
+_compiler_version = None
+
+
+# Digest of the compiler's own modules, so artifacts written by a different
+# version of the compiler are never picked up
+def compiler_version() -> str:
+    global _compiler_version
+
+    if _compiler_version is None:
+        digest = hashlib.sha256()
+        for name in sorted(os.listdir(SOURCE_DIR)):
+            if name.endswith(".py"):
+                with open(os.path.join(SOURCE_DIR, name), "rb") as f:
+                    digest.update(name.encode())
+                    digest.update(f.read())
+        _compiler_version = digest.hexdigest()
+
+    return _compiler_version
+
+
+# Content-addressed store of compilation artifacts. Each artifact is a file
+# named after the entry key, which hashes the source text, the compiler
+# version and the options. Files are written to a temporary name and renamed
+# into place, so concurrent processes only ever see complete artifacts; a
+# file that vanishes mid-read is a miss. Reads refresh the modification time,
+# which eviction uses as the LRU order once the directory exceeds max_size.
+#
+# The directory is only scanned on the first store and once the size it had
+# at the last scan plus what was stored since exceeds max_size, not on every
+# store. Other processes sharing the directory keep their own totals.
+class ArtifactCache:
+    def __init__(self, directory: str = CACHE_DIR, max_size: int = CACHE_SIZE):
+        self.directory = directory
+        self.max_size = max_size
+
+        # Bytes in the directory as of the last scan plus the bytes stored since
+        self.size = None
+
+        self.hits = 0
+        self.misses = 0
+
+    # source is the text, or the bytes of the file
+    def key(self, source, options) -> str:
+        digest = hashlib.sha256()
+        digest.update(compiler_version().encode())
+        digest.update(b"\0" + repr(options).encode() + b"\0")
+        digest.update(source.encode() if isinstance(source, str) else source)
+        return digest.hexdigest()
+
+    def path(self, key: str, artifact: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.{artifact}")
+
+    def get(self, key: str, artifact: str) -> bytes:
+        path = self.path(key, artifact)
+
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+
+        # Best effort: a read-only cache still serves hits, only without LRU order
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+        self.hits += 1
+        return data
+
+    # Returns {artifact: data}, or None unless every artifact is cached
+    def get_all(self, key: str, artifacts) -> dict[str, bytes]:
+        result = {}
+        for artifact in artifacts:
+            data = self.get(key, artifact)
+            if data is None:
+                return None
+            result[artifact] = data
+
+        return result
+
+    def put(self, key: str, artifact: str, data: bytes):
+        path = self.path(key, artifact)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+        if self.size is not None:
+            self.size += len(data)
+
+    def put_all(self, key: str, artifacts: dict[str, bytes]):
+        for artifact, data in artifacts.items():
+            self.put(key, artifact, data)
+
+        if self.size is None or self.size > self.max_size:
+            self.evict()
+
+    # Removes least recently used artifacts until the cache fits in max_size
+    def evict(self):
+        entries = []
+        total = 0
+
+        for subdir in os.scandir(self.directory):
+            if not subdir.is_dir():
+                continue
+            for entry in os.scandir(subdir.path):
+                if entry.name.startswith(".tmp-"):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+
+        if total > self.max_size:
+            entries.sort()
+            for _, size, path in entries:
+                try:
+                    os.unlink(path)
+                except FileNotFoundError:
+                    pass
+
+                total -= size
+                if total <= self.max_size:
+                    break
+
+        self.size = total
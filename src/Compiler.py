@@ -3,6 +3,7 @@ from llvmlite import ir
 from AST import Node, NodeType, Program, Expression, Statement
 from AST import ExpressionStatement, InfixExpression
 from AST import IntegerLiteral, FloatLiteral
+from Arena import ASTArena, NODE_TYPE_CODES
 
 class Compiler:
     def __init__(self):
@@ -11,6 +12,10 @@ class Compiler:
             "float": ir.FloatType()
         }
 
+        self.reset()
+
+    # Starts a new module, so one Compiler can compile any number of programs
+    def reset(self):
         self.module: ir.Module = ir.Module("main")
 
         self.builder: ir.IRBuilder = ir.IRBuilder()
@@ -38,8 +43,12 @@ class Compiler:
 
         self.builder = ir.IRBuilder(block)
 
-        for stmt in node.statements:
-            self.compile(stmt)
+        if isinstance(node, ASTArena):
+            for stmt in node.statements:
+                self.visit_arena_node(node, stmt)
+        else:
+            for stmt in node.statements:
+                self.compile(stmt)
         
         return_value: ir.Constant = ir.Constant(self.type_map["int"], 69)
         self.builder.ret(return_value)
@@ -47,11 +56,30 @@ class Compiler:
     def visit_expression_statement(self, node: ExpressionStatement):
         self.compile(node.expr)
 
+    # Post-order walk with an explicit work stack: an InfixExpression is
+    # expanded once (right, then left pushed on top of it) and built when it is
+    # popped again, taking its operands' (value, type) pairs off the value stack
     def visit_infix_expression(self, node: InfixExpression):
-        operator: str = node.operator
-        left_value, left_type = self.resolve_value(node.left_node)
-        right_value, right_type = self.resolve_value(node.right_node)
-    
+        values = []
+        work = [(node, False)]
+
+        while work:
+            node, expanded = work.pop()
+
+            if node.type() != NodeType.InfixExpression:
+                values.append(self.resolve_value(node))
+            elif expanded:
+                right_value, right_type = values.pop()
+                left_value, left_type = values.pop()
+                values.append(self.build_infix(node.operator, left_value, left_type, right_value, right_type))
+            else:
+                work.append((node, True))
+                work.append((node.right_node, False))
+                work.append((node.left_node, False))
+
+        return values.pop()
+
+    def build_infix(self, operator: str, left_value, left_type, right_value, right_type):
         value = None
         Type = None
 
@@ -82,3 +110,47 @@ class Compiler:
             
             case NodeType.InfixExpression:
                 return self.visit_infix_expression(node)
+
+    # ASTArena counterparts of compile/visit_infix_expression/resolve_value
+    def visit_arena_node(self, arena: ASTArena, row: int):
+        match arena.kind(row):
+            case NodeType.ExpressionStatement:
+                self.visit_arena_node(arena, arena.lefts[row])
+
+            case NodeType.InfixExpression:
+                self.visit_arena_infix_expression(arena, row)
+
+    def visit_arena_infix_expression(self, arena: ASTArena, row: int):
+        infix_code = NODE_TYPE_CODES[NodeType.InfixExpression]
+        kinds = arena.kinds
+
+        values = []
+        work = [(row, False)]
+
+        while work:
+            row, expanded = work.pop()
+
+            if kinds[row] != infix_code:
+                values.append(self.resolve_arena_value(arena, row))
+            elif expanded:
+                right_value, right_type = values.pop()
+                left_value, left_type = values.pop()
+                values.append(self.build_infix(arena.operator(row), left_value, left_type, right_value, right_type))
+            else:
+                work.append((row, True))
+                work.append((arena.rights[row], False))
+                work.append((arena.lefts[row], False))
+
+        return values.pop()
+
+    def resolve_arena_value(self, arena: ASTArena, row: int, value_type: str = None) -> tuple[ir.Value, ir.Type]:
+        match arena.kind(row):
+            case NodeType.IntegerLiteral:
+                Type = self.type_map["int" if value_type is None else value_type]
+                return ir.Constant(Type, arena.value(row)), Type
+            case NodeType.FloatLiteral:
+                Type = self.type_map["float" if value_type is None else value_type]
+                return ir.Constant(Type, arena.value(row)), Type
+
+            case NodeType.InfixExpression:
+                return self.visit_arena_infix_expression(arena, row)
@@ -0,0 +1,166 @@
+import math
+import struct
+
+from AST import Node, NodeType, InfixExpression
+from AST import IntegerLiteral, FloatLiteral
+from Arena import ASTArena, NODE_TYPE_CODES, NO_NODE
+from Error import ErrorHandler
+
+INT_MIN = -(1 << 31)
+
+LITERAL_TYPES = (NodeType.IntegerLiteral, NodeType.FloatLiteral)
+
+
+# Two's complement wrap-around, like i32 add/sub/mul
+def wrap_int32(value: int) -> int:
+    value &= 0xFFFFFFFF
+    return value - (1 << 32) if value & 0x80000000 else value
+
+
+# Rounds to the nearest single precision value, like the "float" type
+def round_float32(value: float) -> float:
+    try:
+        return struct.unpack("f", struct.pack("f", value))[0]
+    except OverflowError:
+        return math.copysign(math.inf, value)
+
+
+# Collapses InfixExpressions whose operands are both literals of the same type,
+# for the operators Compiler lowers. Runs between Parser and Compiler.
+# Division by a constant zero is reported instead of folded.
+class ConstantFolder:
+    def __init__(self, error_handler=None):
+        self.error_handler = error_handler if error_handler else ErrorHandler()
+
+        # Nodes removed from the tree so far
+        self.eliminated = 0
+
+    def fold(self, program):
+        if isinstance(program, ASTArena):
+            self.fold_arena(program)
+            return program
+
+        for stmt in program.statements:
+            stmt.expr = self.fold_expression(stmt.expr)
+
+        return program
+
+    # Post-order walk with an explicit work stack, as in Compiler
+    def fold_expression(self, node: Node) -> Node:
+        results = []
+        work = [(node, False)]
+
+        while work:
+            node, expanded = work.pop()
+
+            if node.type() != NodeType.InfixExpression:
+                results.append(node)
+            elif expanded:
+                node.right_node = results.pop()
+                node.left_node = results.pop()
+                results.append(self.fold_infix_expression(node))
+            else:
+                work.append((node, True))
+                work.append((node.right_node, False))
+                work.append((node.left_node, False))
+
+        return results.pop()
+
+    def fold_infix_expression(self, node: InfixExpression) -> Node:
+        left_type = node.left_node.type()
+        right_type = node.right_node.type()
+        if left_type not in LITERAL_TYPES or right_type not in LITERAL_TYPES:
+            return node
+
+        # No positions for nodes built without a token, as with ASTArena.positions
+        token = node.token
+        pos_start, pos_end = (token.pos_start, token.pos_end) if token else (None, None)
+        value = self.evaluate(node.operator, left_type, node.left_node.value, right_type, node.right_node.value,
+                              pos_start, pos_end)
+        if value is None:
+            return node
+
+        self.eliminated += 2
+        return IntegerLiteral(value) if left_type == NodeType.IntegerLiteral else FloatLiteral(value)
+
+    def fold_arena(self, arena: ASTArena):
+        infix_code = NODE_TYPE_CODES[NodeType.InfixExpression]
+        kinds, lefts, rights = arena.kinds, arena.lefts, arena.rights
+
+        for stmt in arena.statements:
+            work = [(lefts[stmt], False)]
+
+            while work:
+                row, expanded = work.pop()
+
+                if kinds[row] != infix_code:
+                    continue
+
+                if not expanded:
+                    work.append((row, True))
+                    work.append((rights[row], False))
+                    work.append((lefts[row], False))
+                    continue
+
+                left_type, right_type = arena.kind(lefts[row]), arena.kind(rights[row])
+                if left_type not in LITERAL_TYPES or right_type not in LITERAL_TYPES:
+                    continue
+
+                value = self.evaluate(arena.operator(row), left_type, arena.value(lefts[row]),
+                                      right_type, arena.value(rights[row]), *arena.positions(row))
+                if value is None:
+                    continue
+
+                # Rewrite the row in place, so its parent needs no update
+                arena.constants.append(value)
+                kinds[row] = NODE_TYPE_CODES[left_type]
+                lefts[row] = len(arena.constants) - 1
+                rights[row] = NO_NODE
+                self.eliminated += 2
+
+    # Returns the folded value, or None if the expression has to stay as is
+    def evaluate(self, operator: str, left_type: NodeType, left, right_type: NodeType, right, pos_start, pos_end):
+        if left_type != right_type:
+            return None
+
+        if left_type == NodeType.IntegerLiteral:
+            left, right = wrap_int32(left), wrap_int32(right)
+            match operator:
+                case '+':
+                    return wrap_int32(left + right)
+                case '-':
+                    return wrap_int32(left - right)
+                case '*':
+                    return wrap_int32(left * right)
+                case '/':
+                    if right == 0:
+                        self.error_handler.add_error(pos_start, pos_end, "Semantic Error", "Division by zero")
+                        return None
+                    if left == INT_MIN and right == -1:
+                        self.error_handler.add_warning(pos_start, pos_end, "Semantic Warning",
+                                                       "Integer overflow in division")
+                        return None
+
+                    # sdiv truncates toward zero
+                    quotient = abs(left) // abs(right)
+                    return quotient if (left < 0) == (right < 0) else -quotient
+
+        else:
+            left, right = round_float32(left), round_float32(right)
+            match operator:
+                case '+':
+                    return round_float32(left + right)
+                case '-':
+                    return round_float32(left - right)
+                case '*':
+                    return round_float32(left * right)
+                case '/':
+                    if right == 0:
+                        self.error_handler.add_warning(pos_start, pos_end, "Semantic Warning", "Division by zero")
+                        if left == 0 or math.isnan(left):
+                            return math.nan
+                        return math.copysign(math.inf, left) * math.copysign(1.0, right)
+
+                    return round_float32(left / right)
+
+        return None
@@ -0,0 +1,235 @@
+import argparse
+import base64
+import json
+import os
+import socket
+import socketserver
+import sys
+import threading
+import time
+
+from Pipeline import Pipeline, CompileOptions, EXIT_CODES
+from Incremental import IncrementalDocument
+from DaemonClient import SOCKET_PATH
+
+# Compiled when the daemon starts, so llvmlite is imported and the targets
+# are initialized before the first request arrives
+WARMUP_SOURCE = "1 + 2;\n"
+
+
+# One request per line, as JSON, answered with one JSON line:
+#   {"op": "compile" | "run", "source": str, "path": str, "opt_level": str,
+#    "fold": bool, "cpu": str, "features": str, "emit": ["ir", "opt-ir", "object"]}
+#   {"op": "open", "path": str, "source": str}, {"op": "close", "path": str}
+#   {"op": "edit", "path": str, "offset": int, "removed": int, "inserted": str}
+#   {"op": "ping"} and {"op": "shutdown"}
+class RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            try:
+                request = json.loads(line)
+            except ValueError:
+                response = {"ok": False, "error": "Malformed request"}
+            else:
+                response = self.server.respond(request)
+
+            self.wfile.write(json.dumps(response).encode() + b"\n")
+            self.wfile.flush()
+
+
+# Keeps a warm Pipeline (with its Compiler, Optimizer and target machines)
+# per set of codegen options. Connections are served on their own threads,
+# but compilations run one at a time as the pipelines are not thread safe.
+class CompileServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path: str = SOCKET_PATH):
+        if os.path.exists(path):
+            # A socket nobody listens on is left over from a daemon that died
+            with socket.socket(socket.AF_UNIX) as probe:
+                if probe.connect_ex(path) == 0:
+                    raise RuntimeError(f"A daemon is already listening on {path}")
+            os.unlink(path)
+
+        super().__init__(path, RequestHandler)
+        self.path = path
+        self.lock = threading.Lock()
+        self.pipelines = {}
+        self.aots = {}
+        self.jits = {}
+        self.documents = {}
+
+    # Raises ValueError for options main.py would not accept, before a
+    # Pipeline is built and kept for them
+    def pipeline(self, request: dict) -> Pipeline:
+        from Optimizer import OPT_LEVELS
+
+        opt_level = request.get("opt_level", "0")
+        if type(opt_level) is not str or opt_level not in OPT_LEVELS:
+            raise ValueError(f"Unknown optimization level: {opt_level!r}")
+
+        fold = request.get("fold", True)
+        if type(fold) is not bool:
+            raise ValueError(f"fold must be true or false, got {fold!r}")
+
+        cpu, features = request.get("cpu", ""), request.get("features", "")
+        if type(cpu) is not str or type(features) is not str:
+            raise ValueError("cpu and features must be strings")
+
+        options = CompileOptions(opt_level=opt_level, fold=fold, cpu=cpu, features=features)
+
+        key = options.cache_key()
+        if key not in self.pipelines:
+            self.pipelines[key] = Pipeline(options)
+        return self.pipelines[key]
+
+    def aot(self, pipeline: Pipeline):
+        from AOT import AOT
+
+        options = pipeline.options
+        key = options.cache_key()
+        if key not in self.aots:
+            self.aots[key] = AOT(pipeline.optimizer.speed_level, options.cpu, options.features)
+        return self.aots[key]
+
+    # Each JIT owns its target machine, so it cannot share the Optimizer's
+    def jit(self, pipeline: Pipeline):
+        from JIT import JIT
+        from Optimizer import create_target_machine
+
+        options = pipeline.options
+        key = options.cache_key()
+        if key not in self.jits:
+            target_machine = create_target_machine(pipeline.optimizer.speed_level, options.cpu, options.features)
+            self.jits[key] = JIT(target_machine)
+        return self.jits[key]
+
+    def warm_up(self):
+        self.pipeline({}).compile_source(WARMUP_SOURCE, "<warmup>")
+
+    def respond(self, request: dict) -> dict:
+        op = request.get("op")
+
+        if op == "ping":
+            return {"ok": True, "pid": os.getpid()}
+
+        if op == "shutdown":
+            # shutdown() waits for serve_forever, which waits for this handler
+            threading.Thread(target=self.shutdown).start()
+            return {"ok": True}
+
+        if op not in ("compile", "run", "open", "edit", "close"):
+            return {"ok": False, "error": f"Unknown op: {op}"}
+
+        start = time.perf_counter()
+        with self.lock:
+            try:
+                if op in ("compile", "run"):
+                    response = self.compile(request, op == "run")
+                else:
+                    response = self.document(request, op)
+            except Exception as e:
+                response = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+
+        response["seconds"] = time.perf_counter() - start
+        return response
+
+    def compile(self, request: dict, run: bool) -> dict:
+        pipeline = self.pipeline(request)
+        result = pipeline.compile_source(request["source"], request.get("path", "<stdin>"))
+
+        response = {
+            "ok": result.ok,
+            "failed_stage": result.failed_stage,
+            "errors": [str(error) for error in result.diagnostics.errors],
+            "warnings": [str(warning) for warning in result.diagnostics.warnings]
+        }
+        if not result.ok:
+            response["exit_code"] = EXIT_CODES[result.failed_stage]
+            return response
+
+        emit = request.get("emit", ())
+        if "ir" in emit:
+            response["ir"] = result.ir
+        if "opt-ir" in emit:
+            response["opt_ir"] = str(result.llvm_module)
+
+        if "object" in emit:
+            data = self.aot(pipeline).object_code(result.llvm_module)
+            response["object"] = base64.b64encode(data).decode()
+
+        if run:
+            jit = self.jit(pipeline)
+            jit.load(result.llvm_module)
+            try:
+                response["result"] = jit.run()
+            finally:
+                jit.unload(result.llvm_module)
+            response["execute_seconds"] = jit.timings["execute"]
+
+        return response
+
+    # Documents open in an editor, kept lexed and parsed across edits.
+    # Answers with the lexical or syntax errors of the edited text.
+    def document(self, request: dict, op: str) -> dict:
+        path = request["path"]
+
+        if op == "close":
+            self.documents.pop(path, None)
+            return {"ok": True}
+
+        if op == "open":
+            document = self.documents[path] = IncrementalDocument(request["source"], path)
+        elif path in self.documents:
+            document = self.documents[path]
+            offset, removed, inserted = request["offset"], request.get("removed", 0), request.get("inserted", "")
+
+            # type() rather than isinstance, as JSON true and false decode to bools
+            if type(offset) is not int or type(removed) is not int or type(inserted) is not str:
+                return {"ok": False, "error": "Malformed edit: offset and removed must be integers, inserted a string"}
+            try:
+                document.edit(offset, removed, inserted)
+            except ValueError as e:
+                return {"ok": False, "error": str(e)}
+        else:
+            return {"ok": False, "error": f"Document not open: {path}"}
+
+        diagnostics = document.diagnostics()
+        return {
+            "ok": not diagnostics.has_error,
+            "failed_stage": document.failed_stage,
+            "errors": [str(error) for error in diagnostics.errors],
+            "warnings": []
+        }
+
+    def server_close(self):
+        super().server_close()
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="kittyd", description="Serve kitty compilations on a Unix domain socket")
+    parser.add_argument("--socket", default=SOCKET_PATH, help=f"socket path (default: {SOCKET_PATH})")
+    args = parser.parse_args(argv)
+
+    try:
+        server = CompileServer(args.socket)
+    except RuntimeError as e:
+        print(e)
+        sys.exit(1)
+
+    start = time.perf_counter()
+    server.warm_up()
+    print(f"Listening on {args.socket} (warm-up {(time.perf_counter() - start) * 1000:.1f} ms)", flush=True)
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+import argparse
+import base64
+import json
+import os
+import socket
+import sys
+import tempfile
+import time
+
+# Only the standard library is imported here, so the client starts in a few
+# milliseconds; the compiler itself lives in the daemon (Daemon.py)
+SOCKET_PATH = os.environ.get("KITTY_SOCKET") or os.path.join(tempfile.gettempdir(), f"kitty-{os.getuid()}.sock")
+
+# Exit status when the daemon cannot be reached or fails internally
+EXIT_NO_DAEMON = 5
+
+
+# One connection to the daemon, reused for any number of requests
+class DaemonClient:
+    def __init__(self, path: str = SOCKET_PATH):
+        self.socket = socket.socket(socket.AF_UNIX)
+        self.socket.connect(path)
+        self.file = self.socket.makefile("rwb")
+
+    def request(self, request: dict) -> dict:
+        self.file.write(json.dumps(request).encode() + b"\n")
+        self.file.flush()
+
+        line = self.file.readline()
+        if not line:
+            raise ConnectionError("The daemon closed the connection")
+        return json.loads(line)
+
+    def compile(self, source: str, path: str = "<stdin>", emit=("ir",), run: bool = False, **options) -> dict:
+        return self.request({"op": "run" if run else "compile", "source": source, "path": path,
+                             "emit": list(emit), **options})
+
+    def open_document(self, path: str, source: str) -> dict:
+        return self.request({"op": "open", "path": path, "source": source})
+
+    def edit_document(self, path: str, offset: int, removed: int, inserted: str) -> dict:
+        return self.request({"op": "edit", "path": path, "offset": offset, "removed": removed, "inserted": inserted})
+
+    def close_document(self, path: str) -> dict:
+        return self.request({"op": "close", "path": path})
+
+    def ping(self) -> dict:
+        return self.request({"op": "ping"})
+
+    def shutdown(self) -> dict:
+        return self.request({"op": "shutdown"})
+
+    def close(self):
+        self.file.close()
+        self.socket.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def write_output(path: str, data):
+    if path == "-":
+        sys.stdout.write(data)
+        return
+
+    with open(path, "wb" if isinstance(data, bytes) else "w") as f:
+        f.write(data)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="kittyc", description="Compile a kitty program on a running daemon")
+    parser.add_argument("filename", nargs="?")
+    parser.add_argument("-O", dest="opt_level", default="0", metavar="LEVEL",
+                        choices=("0", "1", "2", "3", "s", "z"), help="optimization level (default: 0)")
+    parser.add_argument("--run", action="store_true", help="execute main with the daemon's JIT")
+    parser.add_argument("--emit-ir", metavar="PATH", help="write the unoptimized IR to PATH, or - for stdout")
+    parser.add_argument("--emit-opt-ir", metavar="PATH", help="write the optimized IR to PATH, or - for stdout")
+    parser.add_argument("--emit-obj", metavar="PATH", help="write a native object file")
+    parser.add_argument("--cpu", default="")
+    parser.add_argument("--features", default="")
+    parser.add_argument("--no-fold", dest="fold", action="store_false")
+    parser.add_argument("--socket", default=SOCKET_PATH, help=f"socket path (default: {SOCKET_PATH})")
+    parser.add_argument("--ping", action="store_true", help="check that the daemon is up")
+    parser.add_argument("--shutdown", action="store_true", help="stop the daemon")
+    parser.add_argument("-v", "--verbose", action="store_true", help="print the round trip time")
+    args = parser.parse_args(argv)
+
+    if not (args.filename or args.ping or args.shutdown):
+        parser.error("a filename, --ping or --shutdown is required")
+
+    start = time.perf_counter()
+    try:
+        client = DaemonClient(args.socket)
+    except OSError as e:
+        print(f"Cannot connect to the daemon on {args.socket}: {e.strerror}")
+        sys.exit(EXIT_NO_DAEMON)
+
+    with client:
+        if args.ping or args.shutdown:
+            if args.shutdown:
+                client.shutdown()
+                print(f"Daemon on {args.socket} stopping")
+            else:
+                print(f"Daemon running on {args.socket} (pid {client.ping()['pid']})")
+            return
+
+        with open(args.filename) as f:
+            source = f.read()
+
+        emit = [name for name, path in (("ir", args.emit_ir), ("opt-ir", args.emit_opt_ir),
+                                         ("object", args.emit_obj)) if path]
+        response = client.compile(source, args.filename, emit, args.run, opt_level=args.opt_level,
+                                  fold=args.fold, cpu=args.cpu, features=args.features)
+
+    round_trip = time.perf_counter() - start
+
+    if "error" in response:
+        print(f"Daemon error: {response['error']}")
+        sys.exit(EXIT_NO_DAEMON)
+
+    # The same layout as ErrorHandler.report
+    if response["warnings"]:
+        print("\nWarnings:")
+        for warning in response["warnings"]:
+            print(f" {warning}")
+
+    if response["errors"]:
+        print("\nErrors:")
+        for error in response["errors"]:
+            print(f" {error}")
+
+    if not response["ok"]:
+        sys.exit(response["exit_code"])
+
+    if args.emit_ir:
+        write_output(args.emit_ir, response["ir"])
+    if args.emit_opt_ir:
+        write_output(args.emit_opt_ir, response["opt_ir"])
+    if args.emit_obj:
+        write_output(args.emit_obj, base64.b64decode(response["object"]))
+
+    if args.run:
+        print("===== RUN =====")
+        print(f"main returned {response['result']}")
+
+    if args.verbose:
+        print(f"{'daemon':<10} {response['seconds'] * 1000:10.3f} ms")
+        print(f"{'round trip':<10} {round_trip * 1000:10.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
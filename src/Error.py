@@ -1,16 +1,23 @@
 from strings_with_arrows import *
 
 class Error:
+    # The positions are None for nodes built without a token
     def __init__(self, pos_start, pos_end, error_name, details):
-        self.pos_start = pos_start
-        self.pos_end = pos_end
+        if pos_start is not None:
+            pos_start, pos_end = pos_start.source.retain(pos_start, pos_end)
+        self.pos_start, self.pos_end = pos_start, pos_end
         self.error_name = error_name
         self.details = details
 
     def __str__(self):
         result  = f'{self.error_name}: {self.details}\n'
+        if self.pos_start is None:
+            return result
+
         result += f'File {self.pos_start.fn}, line {self.pos_start.ln}, column {self.pos_start.col}\n'
-        result += '\n\n' + string_with_arrows(self.pos_start.ftxt, self.pos_start, self.pos_end)
+        # No excerpt when the line's text is gone, see StreamSourceMap
+        if self.pos_start.ftxt is not None:
+            result += '\n\n' + string_with_arrows(self.pos_start.ftxt, self.pos_start, self.pos_end)
         return result
 
 
@@ -0,0 +1,241 @@
+from bisect import bisect_left, bisect_right
+from operator import attrgetter
+
+from Token import Token, TokenType
+from Position import Position
+from SourceMap import SourceMap
+from Lexer import Lexer
+from Parser import Parser
+from AST import Program
+from Error import Error, ErrorHandler
+
+# Smallest number of characters a lexing window grows by
+MIN_WINDOW = 256
+
+
+# The text from just after one SEMICOLON token up to and including the next
+# one; the last segment runs to the end of the text and holds EOF. Parser
+# starts a new statement after every SEMICOLON, so a segment lexes and
+# parses to the same tokens and node whatever comes before or after it.
+#
+# Offsets of the segment's tokens, nodes and diagnostics are relative to its
+# start, and the segment is their source map, so they stay valid when edits
+# elsewhere move it. Its start offset and line are absolute for segments
+# before the document's gap and relative to the end of the text after it
+# (see IncrementalDocument).
+class Segment:
+    __slots__ = ("document", "start", "line", "from_end", "tokens", "statement", "lex_errors", "parse_errors")
+
+    def __init__(self, document: "IncrementalDocument", start: int, line: int):
+        self.document = document
+        self.start = start
+        self.line = line
+        self.from_end = False
+
+        self.tokens = []
+        self.statement = None
+        self.lex_errors = []
+        self.parse_errors = []
+
+    @property
+    def offset(self) -> int:
+        return self.start + len(self.document.text) if self.from_end else self.start
+
+    # The line the segment starts on
+    @property
+    def ln(self) -> int:
+        return self.line + self.document.line_count if self.from_end else self.line
+
+    # SourceMap interface
+    @property
+    def fn(self):
+        return self.document.path
+
+    @property
+    def text(self):
+        return self.document.text
+
+    @property
+    def base(self):
+        return -self.offset
+
+    # Only looks at the text between the segment's start and idx, and at the
+    # start of idx's line, so resolving does not depend on the document's size
+    def location(self, idx: int) -> tuple[int, int]:
+        text = self.document.text
+        offset = self.offset
+        idx += offset
+
+        return self.ln + text.count("\n", offset, idx), idx - text.rfind("\n", 0, idx)
+
+    def retain(self, pos_start, pos_end):
+        return pos_start, pos_end
+
+    def add_lex_error(self, idx: int, details: str):
+        idx -= self.offset
+        self.lex_errors.append(Error(Position(idx, self), Position(idx + 1, self), "Lexical Error", details))
+
+
+# A source kept lexed and parsed across edits, for editors. An edit re-lexes
+# from the start of the segment it touches until the new tokens line up with
+# the old ones again, at a SEMICOLON past the edit that also ended an old
+# segment, and re-parses only the segments in between. Every other segment,
+# with its tokens, statement node and diagnostics, is reused.
+#
+# Segments before the gap index store absolute starts and lines and the ones
+# after it starts and lines relative to the end of the text, so an edit only
+# has to touch the segments between the previous edit and this one, not every
+# later segment. Nothing is indexed over the whole text.
+class IncrementalDocument:
+    def __init__(self, text: str = "", path: str = "<stdin>"):
+        self.path = path
+        self.text = ""
+        self.line_count = 1
+
+        self.segments: list[Segment] = []
+        self.gap = 0
+        self.error_segments: set[Segment] = set()
+
+        self.edit(0, 0, text)
+
+    # Replaces removed characters at offset with inserted. Returns how many
+    # characters were re-lexed and how many segments re-parsed. Raises
+    # ValueError, leaving the document as it was, if the range is not in the text.
+    def edit(self, offset: int, removed: int, inserted: str) -> tuple[int, int]:
+        segments = self.segments
+        old_length = len(self.text)
+
+        if not 0 <= offset <= old_length or not 0 <= removed <= old_length - offset:
+            raise ValueError(f"Edit of {removed} characters at offset {offset} is outside the text "
+                             f"({old_length} characters)")
+
+        first = max(bisect_right(segments, offset, key=lambda segment: segment.offset) - 1, 0)
+        self.move_gap(first, old_length, self.line_count)
+        region_start = segments[first].start + old_length if segments else 0
+        region_line = segments[first].line + self.line_count if segments else 1
+
+        old_text = self.text
+        self.text = text = old_text[:offset] + inserted + old_text[offset + removed:]
+        self.line_count += inserted.count("\n") - old_text.count("\n", offset, offset + removed)
+        length = len(text)
+        edit_end = offset + len(inserted)
+
+        new_segments = [Segment(self, region_start, region_line)]
+        resync = resync_end = None
+
+        def emit(type_, literal, start, end):
+            nonlocal resync, resync_end
+            if resync is not None:
+                return
+
+            segment = new_segments[-1]
+            offset = segment.start
+            segment.tokens.append(Token(type_, literal, start - offset, end - offset, segment))
+
+            if type_ == TokenType.SEMICOLON:
+                # Old segments after the first one start relative to the end
+                # of the text, which the edit did not move
+                if start >= edit_end:
+                    j = bisect_left(segments, end - length, first + 1, key=attrgetter("start"))
+                    if j < len(segments) and segments[j].start == end - length:
+                        resync, resync_end = j, end
+                        return
+
+                new_segments.append(Segment(self, end, segment.line + text.count("\n", segment.start, end)))
+
+        lexer = Lexer("", self.path)
+
+        # Windows end after a newline, where no token is split
+        window_start = region_start
+        newline = text.find("\n", edit_end)
+        window_end = newline + 1 if newline >= 0 else length
+
+        while True:
+            eof_overshoot = lexer.scan(text[window_start:window_end], window_start, emit)
+
+            if resync is not None:
+                break
+
+            if window_end == length:
+                eof = length + eof_overshoot
+                emit(TokenType.EOF, None, eof, eof + 1)
+                break
+
+            window_start = window_end
+            newline = text.find("\n", window_end + max(window_end - region_start, MIN_WINDOW))
+            window_end = newline + 1 if newline >= 0 else length
+
+        new_starts = [segment.start for segment in new_segments]
+        for error in lexer.error_handler.errors:
+            idx = error.pos_start.idx
+            if resync_end is None or idx < resync_end:
+                new_segments[bisect_right(new_starts, idx) - 1].add_lex_error(idx, error.details)
+
+        for segment in new_segments:
+            self.parse(segment)
+
+        end = resync if resync is not None else len(segments)
+        for segment in segments[first:end]:
+            self.error_segments.discard(segment)
+        segments[first:end] = new_segments
+        self.gap = first + len(new_segments)
+
+        return window_end - region_start, len(new_segments)
+
+    # Makes the starts and lines of segments[:index] absolute and the rest
+    # relative to the end of a text of the given length and line count
+    def move_gap(self, index: int, length: int, line_count: int):
+        segments = self.segments
+
+        for segment in segments[self.gap:index]:
+            segment.start += length
+            segment.line += line_count
+            segment.from_end = False
+
+        for segment in segments[index:self.gap]:
+            segment.start -= length
+            segment.line -= line_count
+            segment.from_end = True
+
+        self.gap = index
+
+    def parse(self, segment: Segment):
+        error_handler = ErrorHandler()
+        program = Parser(segment.tokens, error_handler).parse_program()
+
+        segment.statement = program.statements[0] if program.statements else None
+        segment.parse_errors = error_handler.errors
+
+        if segment.lex_errors or segment.parse_errors:
+            self.error_segments.add(segment)
+
+    # What Pipeline reports with stop_after="parse": the lexical errors if
+    # there are any, the syntax errors otherwise
+    def diagnostics(self) -> ErrorHandler:
+        segments = sorted(self.error_segments, key=lambda segment: segment.offset)
+
+        diagnostics = ErrorHandler()
+        diagnostics.errors = ([error for segment in segments for error in segment.lex_errors] or
+                              [error for segment in segments for error in segment.parse_errors])
+        diagnostics.has_error = bool(diagnostics.errors)
+
+        return diagnostics
+
+    @property
+    def failed_stage(self) -> str:
+        if any(segment.lex_errors for segment in self.error_segments):
+            return "lex"
+        return "parse" if self.error_segments else None
+
+    def program(self) -> Program:
+        program = Program()
+        program.statements = [segment.statement for segment in self.segments if segment.statement is not None]
+        return program
+
+    # The tokens with file offsets, as Lexer would produce them for the text
+    def tokens(self):
+        source = SourceMap(self.text, self.path)
+        for segment in self.segments:
+            offset = segment.offset
+            for token in segment.tokens:
+                yield Token(token.type, token.literal, offset + token.start, offset + token.end, source)
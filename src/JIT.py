@@ -0,0 +1,72 @@
+import time
+from ctypes import CFUNCTYPE, c_int
+
+import llvmlite.binding as llvm
+
+from Cache import ArtifactCache
+
+# Signature of the main function Compiler.visit_program builds
+MAIN_TYPE = CFUNCTYPE(c_int)
+
+
+# Compiles a module to machine code in-process with MCJIT and calls its main.
+# With an object_cache, the machine code is stored keyed by the module's IR
+# (plus options, e.g. the codegen level) and loaded instead of regenerated.
+class JIT:
+    def __init__(self, target_machine: llvm.TargetMachine, object_cache: ArtifactCache = None, options=()):
+        self.target_machine = target_machine
+        self.engine = None
+
+        self.object_cache = object_cache
+        self.options = (target_machine.triple, llvm.llvm_version_info, *options)
+        self.object_hits = 0
+        self.object_misses = 0
+
+        # Seconds spent in each stage, in order
+        self.timings: dict[str, float] = {}
+
+    # The engine takes ownership of llvm_module, and when it is created, of
+    # the target machine too. Later modules are added to the same engine.
+    def load(self, llvm_module: llvm.ModuleRef):
+        start = time.perf_counter()
+
+        if self.engine is None:
+            self.engine = llvm.create_mcjit_compiler(llvm_module, self.target_machine)
+            if self.object_cache is not None:
+                self.engine.set_object_cache(self.notify_object_compiled, self.get_object)
+        else:
+            self.engine.add_module(llvm_module)
+        self.engine.finalize_object()
+
+        self.timings["codegen"] = time.perf_counter() - start
+
+    def run(self, name: str = "main") -> int:
+        main = MAIN_TYPE(self.engine.get_function_address(name))
+
+        start = time.perf_counter()
+        result = main()
+        self.timings["execute"] = time.perf_counter() - start
+
+        return result
+
+    # Removes a loaded module, so another one defining the same functions can
+    # be loaded next
+    def unload(self, llvm_module: llvm.ModuleRef):
+        self.engine.remove_module(llvm_module)
+
+    # Not memoized by module name: Compiler names every module "main", and
+    # later modules loaded into the engine have different code
+    def object_key(self, llvm_module: llvm.ModuleRef) -> str:
+        return self.object_cache.key(str(llvm_module), self.options)
+
+    # Object cache callbacks, called by the engine around codegen
+    def get_object(self, llvm_module: llvm.ModuleRef) -> bytes:
+        data = self.object_cache.get(self.object_key(llvm_module), "o")
+        if data is None:
+            self.object_misses += 1
+        else:
+            self.object_hits += 1
+        return data
+
+    def notify_object_compiled(self, llvm_module: llvm.ModuleRef, data: bytes):
+        self.object_cache.put_all(self.object_key(llvm_module), {"o": data})
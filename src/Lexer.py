@@ -1,8 +1,12 @@
 from Token import Token, TokenType
+from TokenBuffer import TokenBuffer
 from Position import Position
+from SourceMap import SourceMap, StreamSourceMap, MappedSourceMap
 
 from Error import ErrorHandler
 
+import mmap
+import re
 import string
 
 WHITESPACES = string.whitespace
@@ -10,134 +14,272 @@ DIGITS = string.digits
 LETTERS = string.ascii_letters
 LETTERS_DIGITS = LETTERS + DIGITS
 
+SINGLE_CHAR_TOKENS = {
+    "+": TokenType.PLUS,
+    "-": TokenType.MINUS,
+    "*": TokenType.MULT,
+    "/": TokenType.DIV,
+    "^": TokenType.POW,
+    "(": TokenType.LPAREN,
+    ")": TokenType.RPAREN,
+    ";": TokenType.SEMICOLON,
+}
+
+# Alternatives are tried in order, so a '.' only reaches DOT when it is not
+# the start of a number (i.e. it is not followed by a digit)
+TOKEN_PATTERN = (
+    r"(?P<WS>[" + re.escape(WHITESPACES) + r"]+)"
+    r"|(?P<COMMENT>#[^\n]*\n?)"
+    r"|(?P<NUMBER>[0-9]+(?:\.[0-9]*)?|\.[0-9]+)"
+    r"|(?P<DOT>\.)"
+    r"|(?P<OP>[" + re.escape("".join(SINGLE_CHAR_TOKENS)) + r"])"
+    r"|(?P<ILLEGAL>.)"
+)
+
+TOKEN_REGEX = re.compile(TOKEN_PATTERN, re.DOTALL)
+# The same pattern over the bytes of an ASCII source, with the same groups
+BYTES_TOKEN_REGEX = re.compile(TOKEN_PATTERN.encode(), re.DOTALL)
+
+NON_ASCII_REGEX = re.compile(rb"[\x80-\xff]")
+NEWLINE_BYTE = ord("\n")
+DOT_BYTE = ord(".")
+
+# Operator bytes to their token type and str literal
+BYTES_TOKENS = {char.encode(): (token_type, char) for char, token_type in SINGLE_CHAR_TOKENS.items()}
+
+CHUNK_SIZE = 1 << 16
+
+# Group numbers, compared against match.lastindex in the scanning loop
+WS, COMMENT, NUMBER, DOT, OP, ILLEGAL = (TOKEN_REGEX.groupindex[name] for name in
+                                         ("WS", "COMMENT", "NUMBER", "DOT", "OP", "ILLEGAL"))
+
 
 class Lexer:
     def __init__(self, program: str, path="<stdin>", error_handler=None):
         self.program = program
-        self.current_char = None
-
-        self.pos = Position(idx=-1, ln=1, col=0, fn=path, ftxt=program)
+        self.path = path
+        self.source = SourceMap(program, path)
 
         self.error_handler = error_handler if error_handler else ErrorHandler()
 
-        self.advance()
+    def make_tokens(self):
+        tokens = []
+        append = tokens.append
+        source = self.source
+
+        self.tokenize(lambda type_, literal, start, end: append(Token(type_, literal, start, end, source)))
+
+        return tokens
+
+    def make_token_buffer(self):
+        tokens = TokenBuffer(self.source)
+
+        self.tokenize(tokens.append)
+        tokens.compact()
+
+        return tokens
+
+    def tokenize(self, emit):
+        length = len(self.program)
+        eof = length + self.scan(self.program, 0, emit)
+
+        emit(TokenType.EOF, None, eof, eof + 1)
+
+    # Calls emit(type, literal, start, end) for every token in text, which
+    # sits at offset base of the source and must end on a token boundary.
+    # Returns 1 if text ends in a comment without a trailing newline: the old
+    # skip_comment stepped once past the end of the file and EOF keeps that offset.
+    def scan(self, text: str, base: int, emit) -> int:
+        length = len(text)
+        eof_overshoot = 0
 
-    def advance(self):
-        self.pos.advance(self.current_char)
-        self.current_char = self.program[self.pos.idx] if self.pos.idx < len(self.program) else None
+        for match in TOKEN_REGEX.finditer(text):
+            group = match.lastindex
 
-    def make_number(self):
-        dot_count = 0
-        number = ""
+            if group == OP:
+                idx = base + match.start()
+                emit(SINGLE_CHAR_TOKENS[match.group()], match.group(), idx, idx + 1)
 
-        start_pos = self.pos.copy()
+            elif group == WS:
+                continue
 
-        while self.current_char != None and self.current_char in DIGITS + ".":
-            if self.current_char == ".":
-                if dot_count == 0:
-                    dot_count += 1
+            elif group == COMMENT:
+                end = match.end()
+                eof_overshoot = 1 if end == length and text[end - 1] != "\n" else 0
+                continue
+
+            elif group == NUMBER:
+                number = match.group()
+                idx, end = match.span()
+
+                if "." in number:
+                    if end < length and text[end] == ".":
+                        # Potential error
+                        self.add_char_error(base + end, f"Invalid number format: multiple decimal points in '{number}.'")
+
+                    emit(TokenType.FLOAT, float(number), base + idx, base + end)
                 else:
-                    # Potential error
-                    start_pos_ = self.pos.copy()
-                    end_pos = self.pos.copy()
-                    end_pos.advance()
+                    emit(TokenType.INT, int(number), base + idx, base + end)
+
+            elif group == DOT:
+                # Potential error
+                self.add_char_error(base + match.start(), "Invalid token: decimal point must be followed by a digit")
 
-                    self.error_handler.add_error(
-                        start_pos_, 
-                        end_pos, 
-                        "Lexical Error", 
-                        f"Invalid number format: multiple decimal points in '{number}.'"
-                    )
+            else:
+                # Potential error
+                idx = base + match.start()
+                char = match.group()
+                emit(TokenType.ILLEGAL, char, idx, idx + 1)
 
-                    break
+                self.add_char_error(idx, f"Unrecognized character: '{char}'")
 
-            number += self.current_char
-            self.advance()
+            eof_overshoot = 0
 
-        if dot_count == 0:
-            token = Token(TokenType.INT, int(number), start_pos, self.pos)
-        else:
-            token = Token(TokenType.FLOAT, float(number), start_pos, self.pos)
-        
-        return token
-
-    def skip_whitespaces(self):
-        while self.current_char and self.current_char in WHITESPACES:
-            self.advance()
-    
-    def skip_comment(self):
-        while self.current_char != None and self.current_char != "\n":
-            self.advance()
-        
-        self.advance()
+        return eof_overshoot
 
-    def make_tokens(self):
+    def add_char_error(self, idx, details):
+        self.error_handler.add_error(Position(idx, self.source), Position(idx + 1, self.source), "Lexical Error", details)
+
+
+# Lexes a file object chunk by chunk, yielding tokens as it goes. Chunks are
+# cut after their last newline (no token spans one), so memory stays bounded
+# by the chunk size plus the longest line.
+class StreamLexer(Lexer):
+    def __init__(self, file, path="<stdin>", error_handler=None, chunk_size=CHUNK_SIZE):
+        super().__init__("", path, error_handler)
+
+        self.file = file
+        self.chunk_size = chunk_size
+        self.source = StreamSourceMap(path)
+
+    def __iter__(self):
         tokens = []
+        emit = lambda type_, literal, start, end: tokens.append(Token(type_, literal, start, end, self.source))
+
+        parts = []
+        base = 0
+        current_has_tokens = False
+
+        while True:
+            chunk = self.file.read(self.chunk_size)
+            if not chunk:
+                break
+
+            newline = chunk.rfind("\n")
+            if newline < 0:
+                parts.append(chunk)
+                continue
+
+            parts.append(chunk[:newline + 1])
+            segment = "".join(parts)
+            parts = [chunk[newline + 1:]]
+
+            self.source.feed(segment, current_has_tokens)
+            self.scan(segment, base, emit)
+            base += len(segment)
+
+            current_has_tokens = bool(tokens)
+            yield from tokens
+            tokens.clear()
+
+        segment = "".join(parts)
+
+        self.source.feed(segment, current_has_tokens)
+        eof = base + len(segment) + self.scan(segment, base, emit)
+        emit(TokenType.EOF, None, eof, eof + 1)
+
+        yield from tokens
+
+
+# Lexes a file through a read-only memory map instead of a str copy, so pages
+# are only loaded as the scan reaches them. ASCII files are scanned as bytes,
+# where offsets match the str ones; anything else is decoded and lexed like
+# Lexer does.
+class MappedLexer(Lexer):
+    def __init__(self, path: str, error_handler=None):
+        super().__init__("", path, error_handler)
+
+        with open(path, "rb") as f:
+            try:
+                self.buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                # Empty files cannot be mapped
+                self.buffer = b""
+
+        self.ascii = NON_ASCII_REGEX.search(self.buffer) is None
+        if self.ascii:
+            self.source = MappedSourceMap(self.buffer, path)
+        else:
+            self.program = str(self.buffer, "utf-8")
+            self.source = SourceMap(self.program, path)
+
+    # Unmaps the file. Tokens and diagnostics must be resolved before: the
+    # source map reads the mapped bytes for lines and columns, and so does
+    # every diagnostic created, e.g. by ConstantFolder, to copy its line.
+    def close(self):
+        if isinstance(self.buffer, mmap.mmap):
+            self.buffer.close()
 
-        while self.current_char != None:
-            if self.current_char in DIGITS + ".":
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def tokenize(self, emit):
+        if not self.ascii:
+            return super().tokenize(emit)
+
+        eof = len(self.buffer) + self.scan_bytes(self.buffer, emit)
+        emit(TokenType.EOF, None, eof, eof + 1)
+
+    # Lexer.scan over a bytes-like buffer
+    def scan_bytes(self, buffer, emit) -> int:
+        length = len(buffer)
+        eof_overshoot = 0
+
+        for match in BYTES_TOKEN_REGEX.finditer(buffer):
+            group = match.lastindex
+
+            if group == OP:
+                idx = match.start()
+                token_type, char = BYTES_TOKENS[match.group()]
+                emit(token_type, char, idx, idx + 1)
+
+            elif group == WS:
+                continue
+
+            elif group == COMMENT:
+                end = match.end()
+                eof_overshoot = 1 if end == length and buffer[end - 1] != NEWLINE_BYTE else 0
+                continue
+
+            elif group == NUMBER:
+                number = match.group()
+                idx, end = match.span()
+
+                # int and float accept bytes
+                if b"." in number:
+                    if end < length and buffer[end] == DOT_BYTE:
+                        # Potential error
+                        self.add_char_error(end, f"Invalid number format: multiple decimal points in '{number.decode()}.'")
+
+                    emit(TokenType.FLOAT, float(number), idx, end)
+                else:
+                    emit(TokenType.INT, int(number), idx, end)
+
+            elif group == DOT:
                 # Potential error
-                if self.current_char == "." and (self.pos.idx + 1 >= len(self.program) or self.program[self.pos.idx + 1] not in DIGITS):
-                    start_pos = self.pos.copy()
-                    end_pos = self.pos.copy()
-                    end_pos.advance()
-
-                    self.error_handler.add_error(
-                        start_pos, 
-                        end_pos, 
-                        "Lexical Error",
-                        "Invalid token: decimal point must be followed by a digit"
-                    )
-
-                    self.advance()
-                    continue
-                tokens.append(self.make_number())
-            elif self.current_char in WHITESPACES:
-                self.skip_whitespaces()
-            elif self.current_char == "#":
-                self.skip_comment()
-            elif self.current_char == "+":
-                tokens.append(Token(TokenType.PLUS, literal=self.current_char, pos_start=self.pos))
-                self.advance()
-            elif self.current_char == "-":
-                tokens.append(Token(TokenType.MINUS, literal=self.current_char, pos_start=self.pos))
-                self.advance()
-            elif self.current_char == "*":
-                tokens.append(Token(TokenType.MULT, literal=self.current_char, pos_start=self.pos))
-                self.advance()
-            elif self.current_char == "/":
-                tokens.append(Token(TokenType.DIV, literal=self.current_char, pos_start=self.pos))
-                self.advance()
-            elif self.current_char == "^":
-                tokens.append(Token(TokenType.POW, literal=self.current_char, pos_start=self.pos))
-                self.advance()
-            elif self.current_char == "(":
-                tokens.append(Token(TokenType.LPAREN, literal=self.current_char, pos_start=self.pos))
-                self.advance()
-            elif self.current_char == ")":
-                tokens.append(Token(TokenType.RPAREN, literal=self.current_char, pos_start=self.pos))
-                self.advance()
-            elif self.current_char == ";":
-                tokens.append(Token(TokenType.SEMICOLON, literal=self.current_char, pos_start=self.pos))
-                self.advance()
+                self.add_char_error(match.start(), "Invalid token: decimal point must be followed by a digit")
 
             else:
                 # Potential error
-                tokens.append(Token(TokenType.ILLEGAL, literal=self.current_char, pos_start=self.pos))
-                
-                start_pos = self.pos.copy()
-                end_pos = self.pos.copy()
-                end_pos.advance()
-
-                self.error_handler.add_error(
-                    start_pos, 
-                    end_pos, 
-                    "Lexical Error", 
-                    f"Unrecognized character: '{self.current_char}'"
-                )
-                
-                self.advance()
-
-        tokens.append(Token(TokenType.EOF, pos_start=self.pos))
+                idx = match.start()
+                char = match.group().decode()
+                emit(TokenType.ILLEGAL, char, idx, idx + 1)
 
-        return tokens
+                self.add_char_error(idx, f"Unrecognized character: '{char}'")
+
+            eof_overshoot = 0
+
+        return eof_overshoot
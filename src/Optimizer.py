@@ -0,0 +1,109 @@
+import time
+
+import llvmlite.binding as llvm
+
+# -O level -> (speed level, size level)
+OPT_LEVELS = {
+    "0": (0, 0),
+    "1": (1, 0),
+    "2": (2, 0),
+    "3": (3, 0),
+    "s": (2, 1),
+    "z": (2, 2)
+}
+
+# Inliner thresholds clang uses for -Os and -Oz
+SIZE_INLINING_THRESHOLDS = {
+    1: 50,
+    2: 25
+}
+
+
+# cpu may be "host" for the CPU of this machine, which also defaults the
+# features to the host's
+def create_target_machine(speed_level: int, cpu: str = "", features: str = "",
+                          reloc: str = "default") -> llvm.TargetMachine:
+    if cpu == "host":
+        cpu = llvm.get_host_cpu_name()
+        features = features or llvm.get_host_cpu_features().flatten()
+
+    target = llvm.Target.from_default_triple()
+    return target.create_target_machine(cpu=cpu, features=features, opt=speed_level, reloc=reloc)
+
+
+# Runs the IR built by Compiler through LLVM: parse, verify, then the default
+# per-module pipeline for the chosen -O level. The size levels use the -O2
+# pipeline with unrolling and vectorization off and a lower inlining
+# threshold, as the new pass manager has no separate size pipeline.
+class Optimizer:
+    # time_passes collects LLVM's per-pass timing report in pass_timings
+    def __init__(self, opt_level: str = "2", cpu: str = "", features: str = "", time_passes: bool = False):
+        if opt_level not in OPT_LEVELS:
+            raise ValueError(f"Unknown optimization level: -O{opt_level}")
+
+        self.opt_level = opt_level
+        self.speed_level, self.size_level = OPT_LEVELS[opt_level]
+
+        llvm.initialize_native_target()
+        llvm.initialize_native_asmprinter()
+
+        self.cpu = cpu
+        self.features = features
+        self.target_machine = create_target_machine(self.speed_level, cpu, features)
+
+        # Seconds spent in each stage of the last module, from parse on, in order
+        self.timings: dict[str, float] = {}
+
+        self.time_passes = time_passes
+        self.pass_timings = ""
+
+    # Parses and verifies textual IR, e.g. optimized IR from the cache. Starts
+    # the timings of a new module.
+    def parse(self, text: str) -> llvm.ModuleRef:
+        self.timings = {}
+        self.pass_timings = ""
+        start = time.perf_counter()
+
+        llvm_module = llvm.parse_assembly(text)
+        start = self.record("parse", start)
+
+        llvm_module.verify()
+        self.record("verify", start)
+
+        return llvm_module
+
+    def run_passes(self, llvm_module: llvm.ModuleRef):
+        start = time.perf_counter()
+
+        pass_builder = llvm.create_pass_builder(self.target_machine, self.tuning_options())
+        if self.time_passes:
+            pass_builder.start_pass_timing()
+
+        pass_builder.getModulePassManager().run(llvm_module, pass_builder)
+
+        if self.time_passes:
+            self.pass_timings = pass_builder.finish_pass_timing()
+        self.record("optimize", start)
+
+    def tuning_options(self) -> llvm.PipelineTuningOptions:
+        options = llvm.create_pipeline_tuning_options(self.speed_level)
+
+        if self.size_level:
+            options.loop_unrolling = False
+            options.loop_vectorization = False
+            options.slp_vectorization = False
+            options.inlining_threshold = SIZE_INLINING_THRESHOLDS[self.size_level]
+
+        return options
+
+    def record(self, stage: str, start: float) -> float:
+        now = time.perf_counter()
+        self.timings[stage] = now - start
+        return now
+
+    def report(self):
+        print(f"===== OPTIMIZER (-O{self.opt_level}) =====")
+        for stage, seconds in self.timings.items():
+            print(f"{stage:<10} {seconds * 1000:10.3f} ms")
+        print(f"{'total':<10} {sum(self.timings.values()) * 1000:10.3f} ms")
+        print()
@@ -0,0 +1,79 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from Token import TokenType
+from TokenBuffer import TokenBuffer
+from Lexer import Lexer
+
+# Below this many characters starting the pool costs more than it saves
+MIN_PARALLEL_SIZE = 1 << 20
+
+
+# Lexes one run of whole lines sitting at offset base of the source. Errors
+# come back as (offset, details) pairs, to be reported against the real source.
+def lex_chunk(text: str, base: int, path: str) -> tuple[TokenBuffer, list, int]:
+    lexer = Lexer("", path)
+    tokens = TokenBuffer()
+
+    eof_overshoot = lexer.scan(text, base, tokens.append)
+    tokens.compact()
+
+    return tokens, [(error.pos_start.idx, error.details) for error in lexer.error_handler.errors], eof_overshoot
+
+
+# Lexes a source on a pool of worker processes and concatenates the chunks
+# into one TokenBuffer, identical to the one Lexer builds (literal table
+# included), with diagnostics in source order.
+#
+# Chunks are cut after a newline. No token spans one, and since a comment
+# runs up to and including the next newline, every newline is outside a
+# comment. Workers emit file offsets, so nothing has to be rebased when
+# merging; lines and columns are resolved from the shared SourceMap.
+class ParallelLexer(Lexer):
+    def __init__(self, program: str, path="<stdin>", error_handler=None, jobs: int = None):
+        super().__init__(program, path, error_handler)
+        self.jobs = jobs if jobs else os.cpu_count()
+
+    def make_token_buffer(self):
+        program = self.program
+        if self.jobs == 1 or len(program) < MIN_PARALLEL_SIZE:
+            return super().make_token_buffer()
+
+        chunks = self.chunks()
+        tokens = TokenBuffer(self.source)
+        eof_overshoot = 0
+
+        with ProcessPoolExecutor(self.jobs) as executor:
+            texts = (program[start:end] for start, end in chunks)
+            bases = (start for start, end in chunks)
+
+            for chunk_tokens, errors, eof_overshoot in executor.map(lex_chunk, texts, bases,
+                                                                    [self.path] * len(chunks)):
+                tokens.extend(chunk_tokens)
+                for idx, details in errors:
+                    self.add_char_error(idx, details)
+
+        # Only the last chunk can end in a comment without a newline
+        eof = len(program) + eof_overshoot
+        tokens.append(TokenType.EOF, None, eof, eof + 1)
+        tokens.compact()
+
+        return tokens
+
+    # (start, end) character ranges, about four per job, each ending after a
+    # newline except the last
+    def chunks(self) -> list[tuple[int, int]]:
+        program = self.program
+        length = len(program)
+        parts = self.jobs * 4
+
+        bounds = [0]
+        for i in range(1, parts):
+            cut = program.find("\n", max(length * i // parts, bounds[-1]))
+            if cut < 0:
+                break
+            if bounds[-1] < cut + 1 < length:
+                bounds.append(cut + 1)
+        bounds.append(length)
+
+        return list(zip(bounds, bounds[1:]))
@@ -0,0 +1,98 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from Token import TokenType
+from TokenBuffer import TokenBuffer, TOKEN_TYPE_CODES
+from SourceMap import SourceMap
+from Position import Position
+from Parser import Parser
+from Arena import ASTArena
+from Error import ErrorHandler
+
+# Below this many tokens starting the pool costs more than it saves
+MIN_PARALLEL_TOKENS = 1 << 16
+
+SEMICOLON_CODE = bytes([TOKEN_TYPE_CODES[TokenType.SEMICOLON]])
+
+# State of the current worker process, set up by init_worker
+_literal_table = None
+_source = None
+
+
+def init_worker(literal_table: list, path: str):
+    global _literal_table, _source
+    _literal_table = literal_table
+    # Stands in for the source map, which stays in the parent
+    _source = SourceMap("", path)
+
+
+# Parses one run of whole statements into an arena. Errors come back as
+# (start, end, name, details) tuples, to be resolved against the real source.
+def parse_chunk(types, starts, ends, literals) -> tuple[ASTArena, list]:
+    tokens = TokenBuffer(_source)
+    tokens.types, tokens.starts, tokens.ends, tokens.literals = types, starts, ends, literals
+    tokens.literal_table = _literal_table
+
+    error_handler = ErrorHandler()
+    arena = Parser(tokens, error_handler, ASTArena()).parse_program()
+    arena.source = None
+
+    return arena, [(error.pos_start.idx, error.pos_end.idx, error.error_name, error.details)
+                   for error in error_handler.errors]
+
+
+# Parses a TokenBuffer on a pool of worker processes and stitches the chunks
+# into one ASTArena, with diagnostics in source order. The result is the one
+# Parser gives for the whole stream. Node objects would cost as much to
+# pickle and rebuild as to parse, so the workers always build arenas.
+#
+# Chunks are cut after a SEMICOLON, where Parser always starts a new
+# statement: a valid statement has balanced parentheses, and after an error
+# (an unclosed parenthesis included) Parser synchronizes on the next
+# SEMICOLON anyway.
+class ParallelParser:
+    def __init__(self, tokens: TokenBuffer, error_handler=None, jobs: int = None):
+        self.tokens = tokens
+        self.error_handler = error_handler if error_handler else ErrorHandler()
+        self.jobs = jobs if jobs else os.cpu_count()
+
+    def parse_program(self) -> ASTArena:
+        tokens = self.tokens
+        if self.jobs == 1 or len(tokens) < MIN_PARALLEL_TOKENS:
+            return Parser(tokens, self.error_handler, ASTArena()).parse_program()
+
+        chunks = self.chunks()
+        columns = zip(*((tokens.types[start:end], tokens.starts[start:end], tokens.ends[start:end],
+                         tokens.literals[start:end]) for start, end in chunks))
+
+        program = ASTArena()
+        source = tokens.source
+
+        with ProcessPoolExecutor(self.jobs, initializer=init_worker,
+                                 initargs=(tokens.literal_table, source.fn)) as executor:
+            for arena, errors in executor.map(parse_chunk, *columns):
+                for start, end, name, details in errors:
+                    self.error_handler.add_error(Position(start, source), Position(end, source), name, details)
+
+                program.extend(arena)
+
+        program.source = source
+        return program
+
+    # (start, end) token ranges, about four per job, each ending after a
+    # SEMICOLON except the last
+    def chunks(self) -> list[tuple[int, int]]:
+        types = self.tokens.types.tobytes()
+        count = len(types)
+        parts = self.jobs * 4
+
+        bounds = [0]
+        for i in range(1, parts):
+            cut = types.find(SEMICOLON_CODE, max(count * i // parts, bounds[-1]))
+            if cut < 0:
+                break
+            if bounds[-1] < cut + 1 < count:
+                bounds.append(cut + 1)
+        bounds.append(count)
+
+        return list(zip(bounds, bounds[1:]))
@@ -1,12 +1,10 @@
 from enum import Enum, auto
+from typing import Iterable
 
 from Token import Token, TokenType
 from Error import ErrorHandler
 
-from AST import Statement, Expression, Program
-from AST import ExpressionStatement
-from AST import InfixExpression
-from AST import IntegerLiteral, FloatLiteral
+from AST import NodeFactory
 
 
 class PrecedenceType(Enum):
@@ -24,34 +22,36 @@ PRECEDENCES = {
     TokenType.POW: PrecedenceType.EXPONENT
 }
 
+PRECEDENCE_VALUES = {token_type: precedence.value for token_type, precedence in PRECEDENCES.items()}
+
+INFIX_FRAME = 0
+GROUP_FRAME = 1
+
 
 class Parser:
-    def __init__(self, tokens: list[Token], error_handler=None):
-        self.tokens = tokens
-        self.pos = -1
+    # tokens can be any iterable; only the current token and one token of
+    # lookahead are held, so a StreamLexer can feed the parser directly
+    # nodes builds the AST: a NodeFactory for node objects (the default) or an
+    # ASTArena for the flat representation
+    def __init__(self, tokens: Iterable[Token], error_handler=None, nodes=None):
+        self.tokens = iter(tokens)
         self.current_token = None
+        self.next_token = next(self.tokens, None)
 
         self.error_handler = error_handler if error_handler else ErrorHandler()
+        self.nodes = nodes if nodes is not None else NodeFactory()
         
+        # Parenthesized expressions are handled inside parse_expression
         self.prefix_parse_fns = {
             TokenType.INT: self.parse_int_literal,
-            TokenType.FLOAT: self.parse_float_literal,
-            TokenType.LPAREN: self.parse_grouped_expression
-        }
-
-        self.infix_parse_fns = {
-            TokenType.PLUS: self.parse_infix_expression,
-            TokenType.MINUS: self.parse_infix_expression,
-            TokenType.MULT: self.parse_infix_expression,
-            TokenType.DIV: self.parse_infix_expression,
-            TokenType.POW: self.parse_infix_expression
+            TokenType.FLOAT: self.parse_float_literal
         }
 
         self.advance()
 
     def advance(self):
-        self.pos += 1
-        self.current_token = self.tokens[self.pos] if self.pos < len(self.tokens) else None
+        self.current_token = self.next_token
+        self.next_token = next(self.tokens, None) if self.next_token else None
     
     def synchronize(self, token_types: [TokenType]):
         while (self.current_token and 
@@ -61,8 +61,7 @@ class Parser:
         # self.advance()
 
     def peek_token(self):
-        token = self.tokens[self.pos + 1] if self.pos + 1 < len(self.tokens) else None
-        return token
+        return self.next_token
 
     def current_precedence(self):
         prec = PRECEDENCES.get(self.current_token.type)
@@ -76,25 +75,20 @@ class Parser:
             return PrecedenceType.LOWEST
         return prec
 
+    # Syntax errors are not raised: the parse_* methods record the error,
+    # synchronize past the next semicolon and return None, which every caller
+    # passes straight up. Broken statements are left out of the program.
     def parse_program(self):
-        exceptions = []
-        program = Program()
+        program = self.nodes.program()
 
         while self.current_token and self.current_token.type != TokenType.EOF:
-            try:
-                stmt = self.parse_statement()
-                if stmt is not None:
-                    program.statements.append(stmt)
-                
-                self.advance()
-            except Exception as e:
-                # DEBUGGING PURPOSES
-                exceptions.append(f"Synchronizing after error: {e}")
+            stmt = self.parse_statement()
+            if stmt is None:
+                # Already past the semicolon
+                continue
 
-        if exceptions:
-            print("===== SYNCHRONIZATION =====")
-            for exception in exceptions:
-                print(exception)
+            self.nodes.add_statement(program, stmt)
+            self.advance()
 
         return program
     
@@ -103,6 +97,8 @@ class Parser:
     
     def parse_expression_statement(self):
         expr = self.parse_expression(PrecedenceType.LOWEST)
+        if expr is None:
+            return None
 
         if self.peek_token() and self.peek_token().type == TokenType.SEMICOLON:
             self.advance()
@@ -116,87 +112,102 @@ class Parser:
                 "Expected semicolon ';' after expression")
             self.synchronize([TokenType.SEMICOLON])
             self.advance()
-            raise Exception(f"Expected semicolon ';' after expression")
+            return None
 
-        stmt = ExpressionStatement(expr)
+        stmt = self.nodes.expression_statement(expr)
 
         return stmt
     
+    # Pratt parsing with an explicit stack instead of recursion, so nesting
+    # depth is bounded by memory rather than the interpreter's recursion limit.
+    # Each stack entry is a parse_expression call waiting on a sub-expression:
+    #   (INFIX_FRAME, precedence, left_node, operator token) - the right operand of an infix operator
+    #   (GROUP_FRAME, precedence)                            - the contents of a parenthesis
     def parse_expression(self, precedence):
-        prefix_fn = self.prefix_parse_fns.get(self.current_token.type)
-        if prefix_fn is None:
-            # Potential error
-            token = self.current_token
-            self.error_handler.add_error(
-                token.pos_start,
-                token.pos_end,
-                "Syntax Error",
-                "Expected expression"
-            )
-            # Synchronization need to be improved
-            self.synchronize([TokenType.SEMICOLON])
-            self.advance()
-            raise Exception(f"No prefix parse function for {self.current_token.type}")
-        
-        left_expr = prefix_fn()
-
-        while (self.peek_token() and
-               self.peek_token().type != TokenType.SEMICOLON and 
-               precedence.value < self.peek_precedence().value):
-
-            infix_fn = self.infix_parse_fns.get(self.peek_token().type)
-            if infix_fn is None:
-                return left_expr
-            
-            self.advance()
-
-            left_expr = infix_fn(left_expr)
-
-        return left_expr
-
-    def parse_infix_expression(self, left_node):
-        infix_expr = InfixExpression(left_node=left_node, operator=self.current_token.literal)
-
-        precedence = self.current_precedence()
+        nodes = self.nodes
+        stack = []
+        precedence = precedence.value
 
-        # Handle right associativity for exponentiation
-        if self.current_token.type == TokenType.POW:
-            precedence = PrecedenceType(precedence.value - 1)
-
-        self.advance()
-
-        infix_expr.right_node = self.parse_expression(precedence)
-
-        return infix_expr
-    
-    def parse_grouped_expression(self):
-        self.advance()
-
-        expr = self.parse_expression(PrecedenceType.LOWEST)
-
-        if self.peek_token().type != TokenType.RPAREN:
-            # Potential error
-            # token = self.peek_token()
+        while True:
+            # Prefix position: start of a (sub-)expression
             token = self.current_token
-            self.error_handler.add_error(
-                token.pos_start, 
-                token.pos_end, 
-                "Syntax Error",
-                "Expected closing parenthesis ')' afrer expression")
-                # f"Expected closing parenthesis ')' after {token.pos_start.ftxt[token.pos_start.idx: token.pos_end.idx]}")
-            self.synchronize([TokenType.SEMICOLON])
-            self.advance()
-            raise Exception(f"Expected closing parenthesis ')' after expression")
-
+            if token.type == TokenType.LPAREN:
+                self.advance()
+                stack.append((GROUP_FRAME, precedence))
+                precedence = PrecedenceType.LOWEST.value
+                continue
+
+            prefix_fn = self.prefix_parse_fns.get(token.type)
+            if prefix_fn is None:
+                return self.expected_expression()
+
+            left_expr = prefix_fn()
+
+            while True:
+                peek = self.peek_token()
+                if (peek and
+                    peek.type != TokenType.SEMICOLON and
+                    precedence < PRECEDENCE_VALUES.get(peek.type, 0)):
+
+                    self.advance()
+
+                    stack.append((INFIX_FRAME, precedence, left_expr, self.current_token))
+
+                    precedence = PRECEDENCE_VALUES[self.current_token.type]
+                    # Handle right associativity for exponentiation
+                    if self.current_token.type == TokenType.POW:
+                        precedence -= 1
+
+                    self.advance()
+                    break
+
+                # The innermost pending call returns left_expr
+                if not stack:
+                    return left_expr
+
+                frame = stack.pop()
+                precedence = frame[1]
+
+                if frame[0] == INFIX_FRAME:
+                    operator = frame[3]
+                    left_expr = nodes.infix_expression(frame[2], operator.literal, left_expr, operator)
+                else:
+                    if self.peek_token().type != TokenType.RPAREN:
+                        return self.expected_closing_parenthesis()
+
+                    self.advance()
+
+    def expected_expression(self):
+        # Potential error
+        token = self.current_token
+        self.error_handler.add_error(
+            token.pos_start,
+            token.pos_end,
+            "Syntax Error",
+            "Expected expression"
+        )
+        # Synchronization need to be improved
+        self.synchronize([TokenType.SEMICOLON])
         self.advance()
+        return None
+
+    def expected_closing_parenthesis(self):
+        # Potential error
+        # token = self.peek_token()
+        token = self.current_token
+        self.error_handler.add_error(
+            token.pos_start, 
+            token.pos_end, 
+            "Syntax Error",
+            "Expected closing parenthesis ')' afrer expression")
+            # f"Expected closing parenthesis ')' after {token.pos_start.ftxt[token.pos_start.idx: token.pos_end.idx]}")
+        self.synchronize([TokenType.SEMICOLON])
+        self.advance()
+        return None
 
-        return expr
-        
     def parse_int_literal(self):
-        int_lit = IntegerLiteral(self.current_token.literal)
-        return int_lit
+        return self.nodes.integer_literal(self.current_token.literal)
 
     def parse_float_literal(self):
-        float_lit = FloatLiteral(self.current_token.literal)
-        return float_lit
+        return self.nodes.float_literal(self.current_token.literal)
 
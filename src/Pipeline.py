@@ -0,0 +1,309 @@
+from Lexer import Lexer, StreamLexer, MappedLexer
+from TokenBuffer import TokenBuffer
+from SourceMap import SourceMap
+from Parser import Parser
+from Arena import ASTArena
+from ConstantFolder import ConstantFolder
+from Error import ErrorHandler
+from Cache import ArtifactCache
+from Profiler import PhaseProfiler
+import json_writer
+
+# The AST JSON is only cached, and only required for a hit, when keep_ast_json is set
+CACHED_ARTIFACTS = ("tokens", "ll", "opt.ll")
+
+# Stages after which a compilation can stop, in order
+STAGES = ("lex", "parse", "fold")
+
+# Exit status of the command line tools when a stage reports errors. A batch
+# reports files it cannot read as failing in "read".
+EXIT_CODES = {
+    "lex": 1,
+    "parse": 2,
+    "fold": 3,
+    "read": 6
+}
+
+
+class CompileOptions:
+    # opt_level: an Optimizer level, or None to stop at the ir.Module
+    # stop_after: one of STAGES, or None to go all the way to IR
+    # keep_ast_json: serialize the AST (before folding) into the result
+    # mmap: lex files through a memory map, without reading them into a str
+    # lex_jobs, parse_jobs: worker processes for ParallelLexer and ParallelParser, None for one per core
+    # cache: an ArtifactCache for the tokens, IR and (with keep_ast_json) AST JSON of successful compilations
+    def __init__(self, opt_level: str = None, fold: bool = True, stop_after: str = None, stream: bool = False,
+                 arena: bool = False, cpu: str = "", features: str = "", time_passes: bool = False,
+                 keep_ast_json: bool = False, cache: ArtifactCache = None, mmap: bool = False, lex_jobs: int = 1,
+                 parse_jobs: int = 1):
+        self.opt_level = opt_level
+        self.fold = fold
+        self.stop_after = stop_after
+        self.stream = stream
+        self.arena = arena
+        self.cpu = cpu
+        self.features = features
+        self.time_passes = time_passes
+        self.keep_ast_json = keep_ast_json
+        self.cache = cache
+        self.mmap = mmap
+        self.lex_jobs = lex_jobs
+        self.parse_jobs = parse_jobs
+
+        for name in ("lex_jobs", "parse_jobs"):
+            jobs = getattr(self, name)
+            if jobs is not None and (type(jobs) is not int or jobs < 1):
+                raise ValueError(f"{name} must be a positive integer or None, got {jobs!r}")
+
+    # What the cached artifacts depend on besides the source
+    def cache_key(self) -> tuple:
+        return self.opt_level, self.fold, self.cpu, self.features
+
+
+class CompileResult:
+    def __init__(self, path: str):
+        self.path = path
+        self.source = None
+
+        self.tokens = None
+        self.ast = None
+        self.ast_json = None
+        self.ir = None
+        self.module = None
+        self.llvm_module = None
+
+        self.diagnostics = ErrorHandler()
+        # The stage that reported errors, if any
+        self.failed_stage = None
+        self.eliminated = 0
+
+        # Cached results have no AST or ir.Module, only their text
+        self.from_cache = False
+
+        # The MappedLexer the file was read through with the mmap option
+        self.mapped_lexer = None
+
+    @property
+    def ok(self) -> bool:
+        return self.failed_stage is None
+
+    # Releases the memory map of a file compiled with the mmap option, once
+    # tokens and diagnostics have been rendered
+    def close(self):
+        if self.mapped_lexer is not None:
+            self.mapped_lexer.close()
+
+
+# Runs source text through the compiler's stages and collects everything
+# they produce in a CompileResult, reporting nothing and never exiting. A
+# Pipeline keeps one Compiler and one Optimizer and reuses them for every
+# compilation, so long-lived callers should hold on to it. llvmlite is only
+# loaded when a compilation first gets past the stop_after stages.
+class Pipeline:
+    def __init__(self, options: CompileOptions = None, profiler: PhaseProfiler = None):
+        self.options = options if options else CompileOptions()
+        self.phase = (profiler if profiler else PhaseProfiler()).phase
+
+        self.compiler = None
+        self.optimizer = None
+        self.triple = None
+
+    def compile_file(self, path: str) -> CompileResult:
+        if self.options.mmap:
+            result = CompileResult(path)
+            with self.phase("map"):
+                lexer = MappedLexer(path, result.diagnostics)
+                result.mapped_lexer = lexer
+
+            return self.compile_lexer(result, lexer, lexer.buffer)
+
+        if not self.options.stream:
+            with self.phase("read"), open(path) as f:
+                text = f.read()
+
+            return self.compile_source(text, path)
+
+        result = CompileResult(path)
+
+        # Lexing and parsing are interleaved. Lexical errors are collected
+        # apart so that, as when the lexer runs first, a file with any only
+        # reports those: the syntax errors ILLEGAL tokens cause would be noise.
+        lex_errors = ErrorHandler()
+        with self.phase("lex+parse"), open(path) as f:
+            lexer = StreamLexer(f, path, lex_errors)
+            ast = Parser(lexer, result.diagnostics, self.new_nodes()).parse_program()
+
+        if lex_errors.has_error:
+            result.diagnostics.errors = lex_errors.errors
+            result.failed_stage = "lex"
+            return result
+
+        result.ast = ast
+        return self.compile_ast(result)
+
+    def compile_source(self, text: str, path: str = "<stdin>") -> CompileResult:
+        result = CompileResult(path)
+        result.source = text
+
+        if self.options.lex_jobs == 1:
+            lexer = Lexer(text, path, result.diagnostics)
+        else:
+            from ParallelLexer import ParallelLexer
+            lexer = ParallelLexer(text, path, result.diagnostics, self.options.lex_jobs)
+
+        return self.compile_lexer(result, lexer, text)
+
+    # content is what the cache key is computed from: the text, or the
+    # mapped bytes of the file
+    def compile_lexer(self, result: CompileResult, lexer: Lexer, content) -> CompileResult:
+        options = self.options
+        phase = self.phase
+
+        key = None
+        if options.cache is not None:
+            with phase("cache lookup"):
+                key = options.cache.key(content, options.cache_key())
+                names = CACHED_ARTIFACTS + ("ast.json",) if options.keep_ast_json else CACHED_ARTIFACTS
+                artifacts = options.cache.get_all(key, names)
+
+            if artifacts is not None:
+                try:
+                    return self.load_cached(result, artifacts, lexer.source)
+                except ValueError:
+                    # A corrupt entry is a miss, and gets overwritten
+                    pass
+
+        with phase("lex"):
+            result.tokens = lexer.make_token_buffer()
+
+        if result.diagnostics.has_error:
+            result.failed_stage = "lex"
+            return result
+
+        if options.stop_after == "lex":
+            return result
+
+        with phase("parse"):
+            if options.parse_jobs == 1:
+                result.ast = Parser(result.tokens, result.diagnostics, self.new_nodes()).parse_program()
+            else:
+                from ParallelParser import ParallelParser
+                result.ast = ParallelParser(result.tokens, result.diagnostics, options.parse_jobs).parse_program()
+
+        return self.compile_ast(result, key)
+
+    def compile_ast(self, result: CompileResult, key: str = None) -> CompileResult:
+        options = self.options
+        phase = self.phase
+        diagnostics = result.diagnostics
+
+        if diagnostics.has_error:
+            result.failed_stage = "parse"
+            return result
+
+        # Only successful compilations all the way to optimized IR are cached
+        store = key is not None and options.stop_after is None and options.opt_level is not None
+
+        if options.keep_ast_json:
+            with phase("ast json"):
+                result.ast_json = json_writer.dumps(result.ast.json(), indent=4)
+
+        if options.stop_after == "parse":
+            return result
+
+        if options.fold:
+            with phase("fold"):
+                folder = ConstantFolder(diagnostics)
+                result.ast = folder.fold(result.ast)
+                result.eliminated = folder.eliminated
+
+            if diagnostics.has_error:
+                result.failed_stage = "fold"
+                return result
+
+        if options.stop_after == "fold":
+            return result
+
+        with phase("load backend"):
+            compiler = self.load_backend()
+
+        with phase("codegen"):
+            compiler.reset()
+            compiler.compile(node=result.ast)
+
+            result.module = compiler.module
+            result.module.triple = self.triple
+
+        with phase("stringify"):
+            result.ir = str(result.module)
+
+        if options.opt_level is None:
+            return result
+
+        optimizer = self.load_optimizer()
+
+        with phase("llvm parse"):
+            result.llvm_module = optimizer.parse(result.ir)
+
+        with phase("optimize"):
+            optimizer.run_passes(result.llvm_module)
+
+        if store and not diagnostics.warnings:
+            with phase("cache store"):
+                artifacts = {
+                    "tokens": result.tokens.dumps(),
+                    "ll": result.ir.encode(),
+                    "opt.ll": str(result.llvm_module).encode()
+                }
+                if result.ast_json is not None:
+                    artifacts["ast.json"] = result.ast_json.encode()
+
+                options.cache.put_all(key, artifacts)
+
+        return result
+
+    # Raises ValueError, leaving result untouched, if an artifact is corrupt
+    def load_cached(self, result: CompileResult, artifacts: dict[str, bytes], source: SourceMap) -> CompileResult:
+        tokens = TokenBuffer.loads(artifacts["tokens"], source)
+        ast_json = artifacts["ast.json"].decode() if "ast.json" in artifacts else None
+        ir = artifacts["ll"].decode()
+        opt_ir = artifacts["opt.ll"].decode()
+
+        result.from_cache = True
+        result.tokens, result.ast_json, result.ir = tokens, ast_json, ir
+
+        if self.options.stop_after is None:
+            with self.phase("llvm parse"):
+                result.llvm_module = self.load_optimizer().parse(opt_ir)
+
+        return result
+
+    def new_nodes(self):
+        return ASTArena() if self.options.arena else None
+
+    def load_backend(self):
+        if self.compiler is None:
+            from Compiler import Compiler
+            import llvmlite.binding as llvm
+
+            self.compiler = Compiler()
+            self.triple = llvm.get_default_triple()
+
+        return self.compiler
+
+    def load_optimizer(self):
+        if self.optimizer is None:
+            from Optimizer import Optimizer
+
+            options = self.options
+            self.optimizer = Optimizer(options.opt_level, options.cpu, options.features, options.time_passes)
+
+        return self.optimizer
+
+
+def compile_source(text: str, options: CompileOptions = None, path: str = "<stdin>") -> CompileResult:
+    return Pipeline(options).compile_source(text, path)
+
+
+def compile_file(path: str, options: CompileOptions = None) -> CompileResult:
+    return Pipeline(options).compile_file(path)
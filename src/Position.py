@@ -1,20 +1,33 @@
+from SourceMap import SourceMap
+
+
 class Position:
-    def __init__(self, idx, ln, col, fn, ftxt):
+    __slots__ = ("idx", "source")
+
+    def __init__(self, idx: int, source: SourceMap):
         self.idx = idx
-        self.ln = ln
-        self.col = col
-        self.fn = fn
-        self.ftxt = ftxt
+        self.source = source
 
-    def advance(self, current_char=None):
-        self.idx += 1
-        self.col += 1
+    # Line and column are resolved from the source map only when asked for
+    @property
+    def ln(self):
+        return self.source.location(self.idx)[0]
 
-        if current_char == '\n':
-            self.ln += 1
-            self.col = 1
+    @property
+    def col(self):
+        return self.source.location(self.idx)[1]
 
+    @property
+    def fn(self):
+        return self.source.fn
+
+    @property
+    def ftxt(self):
+        return self.source.text
+
+    def advance(self, current_char=None):
+        self.idx += 1
         return self
 
     def copy(self):
-        return Position(self.idx, self.ln, self.col, self.fn, self.ftxt)
+        return Position(self.idx, self.source)
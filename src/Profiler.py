@@ -0,0 +1,102 @@
+import gc
+import re
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+
+import json_writer
+
+# Row of LLVM's pass timing report: one "seconds (percent%)" column per
+# clock, the wall clock last, then the pass name
+PASS_TIMING_REGEX = re.compile(r"^\s*((?:[0-9.]+ \(\s*[0-9.]+%\)\s+)+)(\S.*)$")
+PASS_TIME_REGEX = re.compile(r"([0-9.]+) \(")
+
+DISABLED = nullcontext()
+
+
+# Records wall and CPU time per compiler phase and, with memory, the
+# tracemalloc peak, the memory still allocated at the end and the change in
+# the number of gc-tracked objects. When both are off, phase() hands out a
+# shared no-op context manager, so an instrumented driver costs nothing.
+class PhaseProfiler:
+    def __init__(self, timing: bool = False, memory: bool = False):
+        self.timing = timing
+        self.memory = memory
+        self.enabled = timing or memory
+
+        self.phases = []
+        self.passes = {}
+
+        if memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def phase(self, name: str):
+        return self.measure(name) if self.enabled else DISABLED
+
+    @contextmanager
+    def measure(self, name: str):
+        record = {"phase": name}
+
+        if self.memory:
+            objects = len(gc.get_objects())
+            tracemalloc.reset_peak()
+            current = tracemalloc.get_traced_memory()[0]
+
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        try:
+            yield
+        finally:
+            record["wall"] = time.perf_counter() - wall
+            record["cpu"] = time.process_time() - cpu
+
+            if self.memory:
+                end, peak = tracemalloc.get_traced_memory()
+                record["peak"] = peak - current
+                record["retained"] = end - current
+                record["objects"] = len(gc.get_objects()) - objects
+
+            self.phases.append(record)
+
+    # Adds the rows of a report from PassBuilder.finish_pass_timing, summing
+    # passes that ran more than once
+    def add_pass_timings(self, report: str):
+        for line in report.splitlines():
+            match = PASS_TIMING_REGEX.match(line)
+            if match is None or match.group(2) == "Total":
+                continue
+
+            wall = float(PASS_TIME_REGEX.findall(match.group(1))[-1])
+            name = match.group(2).strip()
+
+            total, runs = self.passes.get(name, (0.0, 0))
+            self.passes[name] = (total + wall, runs + 1)
+
+    def json(self) -> dict:
+        return {
+            "phases": self.phases,
+            "passes": [{"pass": name, "wall": wall, "runs": runs}
+                       for name, (wall, runs) in sorted(self.passes.items(), key=lambda item: -item[1][0])]
+        }
+
+    def dumps(self, format: str = "table") -> str:
+        if format == "json":
+            return json_writer.dumps(self.json(), indent=4) + "\n"
+
+        header = f"{'phase':<14} {'wall ms':>10} {'cpu ms':>10}"
+        if self.memory:
+            header += f" {'peak KiB':>10} {'kept KiB':>10} {'objects':>9}"
+        lines = ["===== PHASES =====", header]
+
+        for record in self.phases:
+            line = f"{record['phase']:<14} {record['wall'] * 1000:10.3f} {record['cpu'] * 1000:10.3f}"
+            if self.memory:
+                line += f" {record['peak'] / 1024:10.1f} {record['retained'] / 1024:10.1f} {record['objects']:9d}"
+            lines.append(line)
+
+        if self.passes:
+            lines += ["", "===== LLVM PASSES =====", f"{'pass':<50} {'wall ms':>10} {'runs':>5}"]
+            for entry in self.json()["passes"]:
+                lines.append(f"{entry['pass'][:50]:<50} {entry['wall'] * 1000:10.3f} {entry['runs']:5d}")
+
+        return "\n".join(lines) + "\n"
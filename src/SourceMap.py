@@ -0,0 +1,133 @@
+from array import array
+from bisect import bisect_right
+
+
+class SourceMap:
+    NEWLINE = "\n"
+
+    # text starts at offset base of the file, on line first_line
+    def __init__(self, text: str, fn="<stdin>", base: int = 0, first_line: int = 1):
+        self.text = text
+        self.fn = fn
+        self.base = base
+        self.first_line = first_line
+
+        # Offsets (into text) at which each line starts, built on first lookup
+        self.line_starts = None
+
+    def build_line_starts(self):
+        text = self.text
+        newline = self.NEWLINE
+        line_starts = array("q", [0])
+
+        idx = text.find(newline)
+        while idx >= 0:
+            line_starts.append(idx + 1)
+            idx = text.find(newline, idx + 1)
+
+        self.line_starts = line_starts
+        return line_starts
+
+    # Returns the 1-based (line, column) of a file offset
+    def location(self, idx: int) -> tuple[int, int]:
+        line_starts = self.line_starts if self.line_starts is not None else self.build_line_starts()
+
+        local = idx - self.base
+        ln = bisect_right(line_starts, local)
+        return self.first_line + ln - 1, local - line_starts[ln - 1] + 1
+
+    # Called for positions that have to stay resolvable after lexing, e.g.
+    # the ones held by diagnostics. The whole text is kept, so nothing to do.
+    def retain(self, pos_start, pos_end):
+        return pos_start, pos_end
+
+
+# Source map for StreamLexer. It keeps the text of the segment being lexed
+# and of the last earlier segment that produced tokens (the parser may still
+# hold one of them), plus the start offset of every line so older positions,
+# e.g. of AST nodes, still resolve. Positions held by diagnostics are moved
+# onto a copy of their lines. Diagnostics on lines that are no longer kept,
+# e.g. from ConstantFolder, keep their line and column but have no excerpt.
+class StreamSourceMap:
+    def __init__(self, fn="<stdin>"):
+        self.fn = fn
+
+        self.previous = None
+        self.current = SourceMap("", fn)
+        self.line_starts = array("q", [0])
+
+    # Segments are fed in order and every one but the last ends with a newline
+    def feed(self, segment: str, current_has_tokens: bool):
+        current = self.current
+        if current_has_tokens:
+            self.previous = current
+
+        base = current.base + len(current.text)
+        self.current = SourceMap(segment, self.fn, base, len(self.line_starts))
+
+        idx = segment.find("\n")
+        while idx >= 0:
+            self.line_starts.append(base + idx + 1)
+            idx = segment.find("\n", idx + 1)
+
+    # The kept segment holding idx, if any
+    def segment(self, idx: int) -> SourceMap:
+        if idx >= self.current.base:
+            return self.current
+        if self.previous is not None and idx >= self.previous.base:
+            return self.previous
+        return None
+
+    def location(self, idx: int) -> tuple[int, int]:
+        ln = bisect_right(self.line_starts, idx)
+        return ln, idx - self.line_starts[ln - 1] + 1
+
+    def retain(self, pos_start, pos_end):
+        ln = self.location(pos_start.idx)[0]
+        line_start = self.line_starts[ln - 1]
+
+        segment = self.segment(line_start)
+        if segment is None:
+            fragment = missing_line(self.fn, line_start, ln)
+        else:
+            line_end = segment.text.find("\n", max(pos_end.idx, line_start) - segment.base)
+            text = segment.text[line_start - segment.base:line_end if line_end >= 0 else len(segment.text)]
+            fragment = line_fragment(text, self.fn, line_start, ln)
+
+        return type(pos_start)(pos_start.idx, fragment), type(pos_end)(pos_end.idx, fragment)
+
+
+# Source map over the bytes of a memory-mapped ASCII file, in which byte
+# offsets are character offsets. Nothing is decoded up front: positions held
+# by diagnostics are moved onto a decoded copy of their lines.
+class MappedSourceMap(SourceMap):
+    NEWLINE = b"\n"
+
+    def retain(self, pos_start, pos_end):
+        ln = self.location(pos_start.idx)[0]
+        line_start = self.line_starts[ln - 1]
+
+        buffer = self.text
+        line_end = buffer.find(b"\n", max(pos_end.idx, line_start))
+        text = buffer[line_start:line_end if line_end >= 0 else len(buffer)].decode("ascii")
+
+        fragment = line_fragment(text, self.fn, line_start, ln)
+        return type(pos_start)(pos_start.idx, fragment), type(pos_end)(pos_end.idx, fragment)
+
+
+# A SourceMap of just the lines in text, the first of which is line ln and
+# starts at offset line_start of the file
+def line_fragment(text: str, fn: str, line_start: int, ln: int) -> SourceMap:
+    if ln > 1:
+        # Keep the preceding newline, string_with_arrows prints it
+        return SourceMap("\n" + text, fn, line_start - 1, ln - 1)
+    return SourceMap(text, fn)
+
+
+# A SourceMap for line ln, starting at offset line_start of the file, whose
+# text is no longer available: positions on it still resolve, and diagnostics
+# print no excerpt
+def missing_line(fn: str, line_start: int, ln: int) -> SourceMap:
+    fragment = SourceMap(None, fn, line_start, ln)
+    fragment.line_starts = array("q", [0])
+    return fragment
@@ -1,6 +1,7 @@
 from enum import Enum
 
 from Position import Position
+from SourceMap import SourceMap
 
 class TokenType(Enum):
     INT = "INT"
@@ -19,17 +20,23 @@ class TokenType(Enum):
 
 
 class Token:
-    def __init__(self, type_: TokenType, literal=None, pos_start: Position=None, pos_end: Position=None):
+    __slots__ = ("type", "literal", "start", "end", "source")
+
+    # start inclusive and end exclusive, as offsets into source.text
+    def __init__(self, type_: TokenType, literal=None, start: int = 0, end: int = None, source: SourceMap = None):
         self.type = type_
         self.literal = literal
-        
-        if pos_start:
-            self.pos_start = pos_start.copy()
-            self.pos_end = pos_start.copy()
-            self.pos_end.advance() # exclusive
-
-        if pos_end:
-            self.pos_end = pos_end.copy()
+        self.start = start
+        self.end = start + 1 if end is None else end
+        self.source = source
+
+    @property
+    def pos_start(self):
+        return Position(self.start, self.source)
+
+    @property
+    def pos_end(self):
+        return Position(self.end, self.source)
 
     def __str__(self):
         return f"{self.type}" + (f": {self.literal}" if self.literal else "") + f" [line no: {self.pos_start.ln}, col no: {self.pos_start.col}]"
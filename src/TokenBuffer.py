@@ -0,0 +1,135 @@
+from array import array
+import json
+import struct
+
+from Token import Token, TokenType
+from SourceMap import SourceMap
+
+TOKEN_TYPES = tuple(TokenType)
+TOKEN_TYPE_CODES = {token_type: code for code, token_type in enumerate(TOKEN_TYPES)}
+
+# Serialized form: a little-endian header with the token count and the size
+# of the literal table JSON, then the columns in native byte order, then the JSON
+HEADER = struct.Struct("<QQ")
+COLUMN_TYPECODES = ("B", "q", "q", "I")
+TOKEN_SIZE = sum(array(typecode).itemsize for typecode in COLUMN_TYPECODES)
+
+
+# Token stream stored as parallel typed columns. Literals are interned, so
+# every repeated number or operator shares a single table entry. Tokens are
+# materialized on indexing, which lets Parser consume it like a list.
+class TokenBuffer:
+    def __init__(self, source: SourceMap = None):
+        self.source = source
+
+        self.types = array("B")
+        self.starts = array("q")
+        self.ends = array("q")
+        self.literals = array("I")
+
+        self.literal_table = [None]
+        self.literal_codes = None
+
+    # Keyed by class as well, so 1 and 1.0 get separate entries
+    def build_literal_codes(self) -> dict:
+        self.literal_codes = {(value.__class__, value): code for code, value in enumerate(self.literal_table)}
+        return self.literal_codes
+
+    def append(self, type_: TokenType, literal, start: int, end: int):
+        literal_codes = self.literal_codes
+        if literal_codes is None:
+            literal_codes = self.build_literal_codes()
+
+        key = (literal.__class__, literal)
+        literal_code = literal_codes.get(key)
+        if literal_code is None:
+            literal_code = literal_codes[key] = len(self.literal_table)
+            self.literal_table.append(literal)
+
+        self.types.append(TOKEN_TYPE_CODES[type_])
+        self.starts.append(start)
+        self.ends.append(end)
+        self.literals.append(literal_code)
+
+    # Appends the tokens of another buffer, e.g. one lexed from a later part of
+    # the same source, interning its literals into this buffer's table
+    def extend(self, other: "TokenBuffer"):
+        literal_codes = self.literal_codes
+        if literal_codes is None:
+            literal_codes = self.build_literal_codes()
+
+        codes = []
+        for literal in other.literal_table:
+            key = (literal.__class__, literal)
+            code = literal_codes.get(key)
+            if code is None:
+                code = literal_codes[key] = len(self.literal_table)
+                self.literal_table.append(literal)
+            codes.append(code)
+
+        self.types.extend(other.types)
+        self.starts.extend(other.starts)
+        self.ends.extend(other.ends)
+        self.literals.extend(array("I", [codes[code] for code in other.literals]))
+
+    # Drops the interning index once the buffer is complete; it is rebuilt
+    # from literal_table if anything is appended later
+    def compact(self):
+        self.literal_codes = None
+
+    def __len__(self):
+        return len(self.types)
+
+    def __getitem__(self, i: int) -> Token:
+        return Token(TOKEN_TYPES[self.types[i]], self.literal_table[self.literals[i]],
+                     self.starts[i], self.ends[i], self.source)
+
+    def __iter__(self):
+        source = self.source
+        literal_table = self.literal_table
+        for code, start, end, literal in zip(self.types, self.starts, self.ends, self.literals):
+            yield Token(TOKEN_TYPES[code], literal_table[literal], start, end, source)
+
+    def nbytes(self) -> int:
+        return sum(column.itemsize * len(column) for column in (self.types, self.starts, self.ends, self.literals))
+
+    # Serialized form of the columns and literal table, without the source
+    def dumps(self) -> bytes:
+        literal_table = json.dumps(self.literal_table).encode()
+        columns = (self.types, self.starts, self.ends, self.literals)
+
+        return b"".join((HEADER.pack(len(self), len(literal_table)),
+                         *(column.tobytes() for column in columns), literal_table))
+
+    # Raises ValueError if data is not something dumps wrote, e.g. a
+    # truncated or tampered cache entry. Only plain data is decoded.
+    @classmethod
+    def loads(cls, data: bytes, source: SourceMap = None):
+        if len(data) < HEADER.size:
+            raise ValueError("Truncated token stream")
+
+        count, table_size = HEADER.unpack_from(data)
+        if len(data) != HEADER.size + count * TOKEN_SIZE + table_size:
+            raise ValueError("Token stream size does not match its header")
+
+        tokens = cls(source)
+        offset = HEADER.size
+        columns = []
+        for typecode in COLUMN_TYPECODES:
+            column = array(typecode)
+            column.frombytes(data[offset:offset + count * column.itemsize])
+            offset += count * column.itemsize
+            columns.append(column)
+
+        literal_table = json.loads(data[offset:])
+        if (not isinstance(literal_table, list) or not literal_table or literal_table[0] is not None or
+                not all(isinstance(literal, (int, float, str)) and not isinstance(literal, bool)
+                        for literal in literal_table[1:])):
+            raise ValueError("Malformed literal table")
+
+        tokens.types, tokens.starts, tokens.ends, tokens.literals = columns
+        if count and (max(tokens.types) >= len(TOKEN_TYPES) or max(tokens.literals) >= len(literal_table)):
+            raise ValueError("Token stream refers to unknown token types or literals")
+
+        tokens.literal_table = literal_table
+        return tokens
@@ -0,0 +1,65 @@
+import json
+from json.encoder import encode_basestring_ascii
+
+# Same output as json.dumps(value, indent=indent), but dicts and lists are
+# walked with an explicit stack, so arbitrarily deep ASTs can be written.
+# Note that indented output grows quadratically with nesting depth; pass
+# indent=None for compact output.
+def dumps(value, indent=4) -> str:
+    chunks = []
+    # (value, depth) to encode, or (text, None) to copy as is
+    stack = [(value, 0)]
+
+    while stack:
+        item, depth = stack.pop()
+
+        if depth is None:
+            chunks.append(item)
+
+        elif isinstance(item, dict):
+            if not item:
+                chunks.append("{}")
+                continue
+
+            newline, separator = layout(indent, depth + 1)
+            stack.append((layout(indent, depth)[0] + "}", None))
+
+            entries = list(item.items())
+            for i in range(len(entries) - 1, -1, -1):
+                key, entry = entries[i]
+                stack.append((entry, depth + 1))
+                stack.append(((separator if i else "{") + newline + encode_basestring_ascii(key) + ": ", None))
+
+        elif isinstance(item, list):
+            if not item:
+                chunks.append("[]")
+                continue
+
+            newline, separator = layout(indent, depth + 1)
+            stack.append((layout(indent, depth)[0] + "]", None))
+
+            for i in range(len(item) - 1, -1, -1):
+                stack.append((item[i], depth + 1))
+                stack.append(((separator if i else "[") + newline, None))
+
+        elif isinstance(item, str):
+            chunks.append(encode_basestring_ascii(item))
+
+        elif type(item) is int:
+            chunks.append(int.__repr__(item))
+
+        else:
+            chunks.append(json.dumps(item))
+
+    return "".join(chunks)
+
+
+# Line break before an item at the given depth, and the separator between items
+def layout(indent, depth) -> tuple[str, str]:
+    if indent is None:
+        return "", ", "
+    return "\n" + " " * (indent * depth), ","
+
+
+def dump(value, fp, indent=4):
+    fp.write(dumps(value, indent))
@@ -1,59 +1,233 @@
+import argparse
+import os
 import sys
-import json
+import time
+
+from Pipeline import Pipeline, CompileOptions, EXIT_CODES
+from Cache import ArtifactCache, CACHE_DIR, CACHE_SIZE
+from Profiler import PhaseProfiler
+from Batch import BatchCompiler, print_report
+
+DUMPS = ("source", "tokens", "ast", "ir", "opt_ir")
+
+# The keys of Optimizer.OPT_LEVELS. Everything that needs llvmlite is only
+# imported once codegen starts, so --check, --tokens and --ast never load it.
+OPT_LEVEL_NAMES = ("0", "1", "2", "3", "s", "z")
+
+
+# A number of worker processes: a positive integer, or "auto" (None) for one per core
+def job_count(value: str):
+    if value == "auto":
+        return None
+    if not value.isdigit() or int(value) < 1:
+        raise argparse.ArgumentTypeError(f"expected a positive integer or auto, got {value!r}")
+    return int(value)
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="kitty", description="Compile a kitty program")
+    parser.add_argument("filenames", nargs="+", metavar="filename",
+                        help="a file, or several files or directories to compile as a batch")
+    parser.add_argument("-O", dest="opt_level", choices=OPT_LEVEL_NAMES, default="0", metavar="LEVEL",
+                        help="optimization level: 0, 1, 2, 3, s or z (default: 0)")
+    parser.add_argument("--run", action="store_true", help="execute main with the JIT")
+    parser.add_argument("--emit-obj", metavar="FILE", help="write a native object file")
+    parser.add_argument("--shared", metavar="FILE", help="link a shared library exporting main")
+    parser.add_argument("--cpu", default="", help="target CPU: host, generic or an LLVM CPU name")
+    parser.add_argument("--features", default="", help="target features, e.g. +avx2,-fma")
+    parser.add_argument("--stream", action="store_true", help="lex the file in chunks while parsing")
+    parser.add_argument("--mmap", action="store_true", help="lex the file through a memory map instead of reading it")
+    parser.add_argument("--lex-jobs", type=job_count, default=1, metavar="N",
+                        help="lex on N worker processes, or auto for one per core (default: 1)")
+    parser.add_argument("--parse-jobs", type=job_count, default=1, metavar="N",
+                        help="parse on N worker processes, or auto for one per core (default: 1)")
+    parser.add_argument("--no-fold", dest="fold", action="store_false", help="disable constant folding")
+    parser.add_argument("--no-cache", dest="cache", action="store_false", help="disable the compilation cache")
+    parser.add_argument("--cache-dir", default=CACHE_DIR)
+    parser.add_argument("--cache-size", type=int, default=CACHE_SIZE, metavar="BYTES")
+    parser.add_argument("-v", "--verbose", action="store_true", help="print optimizer and backend timings")
+
+    batch = parser.add_argument_group("batch mode")
+    batch.add_argument("-j", "--jobs", type=job_count, metavar="N",
+                       help="worker processes, or auto for one per core (default: auto)")
+    batch.add_argument("--out-dir", metavar="DIR", help="write the IR of every compiled file under DIR")
+
+    modes = parser.add_argument_group("modes", "stop early, without loading the backend")
+    modes = modes.add_mutually_exclusive_group()
+    modes.add_argument("--check", dest="stop_after", action="store_const", const="fold",
+                       help="only report diagnostics")
+    modes.add_argument("--tokens", dest="stop_after", action="store_const", const="lex",
+                       help="print the tokens")
+    modes.add_argument("--ast", dest="stop_after", action="store_const", const="parse",
+                       help="print the AST as JSON")
+
+    report = parser.add_argument_group("instrumentation")
+    report.add_argument("--time-phases", action="store_true",
+                        help="report wall and CPU time per phase and per LLVM pass")
+    report.add_argument("--mem-report", action="store_true",
+                        help="report tracemalloc peak, retained memory and object counts per phase")
+    report.add_argument("--phase-format", choices=("table", "json"), default="table")
+    report.add_argument("--phase-output", default="-", metavar="PATH", help="default: stdout")
+
+    dumps = parser.add_argument_group("dumps", "each dump is written to PATH, or to stdout if PATH is -")
+    dumps.add_argument("--dump-source", metavar="PATH")
+    dumps.add_argument("--dump-tokens", metavar="PATH")
+    dumps.add_argument("--dump-ast", metavar="PATH", help="the AST as JSON, before constant folding")
+    dumps.add_argument("--dump-ir", metavar="PATH")
+    dumps.add_argument("--dump-opt-ir", metavar="PATH")
+
+    args = parser.parse_intermixed_args(argv)
+    if args.stop_after == "lex":
+        args.dump_tokens = "-"
+    elif args.stop_after == "parse":
+        args.dump_ast = "-"
+
+    if args.stop_after and (args.run or args.emit_obj or args.shared):
+        parser.error("--check, --tokens and --ast cannot be combined with --run, --emit-obj or --shared")
+    args.batch = len(args.filenames) > 1 or os.path.isdir(args.filenames[0])
+    if args.batch and (args.run or args.emit_obj or args.shared or args.time_phases or args.mem_report or
+                       any(getattr(args, f"dump_{name}") for name in DUMPS)):
+        parser.error("compiling several files only supports --check and writing IR with --out-dir")
+    if not args.batch and (args.jobs is not None or args.out_dir):
+        parser.error("--jobs and --out-dir are only used when compiling several files")
+    if args.stream and (args.dump_source or args.dump_tokens):
+        parser.error("--dump-source and --dump-tokens are not available with --stream")
+    if args.mmap and (args.stream or args.dump_source or args.lex_jobs != 1):
+        parser.error("--mmap cannot be combined with --stream, --dump-source or --lex-jobs")
+    if (args.lex_jobs != 1 or args.parse_jobs != 1) and (args.stream or args.batch):
+        parser.error("--lex-jobs and --parse-jobs cannot be combined with --stream or several files")
+
+    return args
+
+
+# Writes a dump with a single write call
+def write_dump(path: str, text: str):
+    if path == "-":
+        sys.stdout.write(text)
+        sys.stdout.flush()
+    else:
+        with open(path, "w") as f:
+            f.write(text)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    start_time = time.perf_counter()
+
+    profiler = PhaseProfiler(args.time_phases, args.mem_report)
+    phase = profiler.phase
+
+    options = CompileOptions(
+        opt_level=args.opt_level,
+        fold=args.fold,
+        stop_after=args.stop_after,
+        stream=args.stream,
+        cpu=args.cpu,
+        features=args.features,
+        time_passes=args.time_phases,
+        keep_ast_json=bool(args.dump_ast),
+        cache=ArtifactCache(args.cache_dir, args.cache_size) if args.cache else None,
+        mmap=args.mmap,
+        lex_jobs=args.lex_jobs,
+        parse_jobs=args.parse_jobs
+    )
+    pipeline = Pipeline(options, profiler)
+    if args.batch:
+        return compile_batch(args, options)
+
+    result = pipeline.compile_file(args.filenames[0])
+
+    if args.dump_source:
+        write_dump(args.dump_source, result.source)
+
+    if args.dump_tokens and result.tokens is not None:
+        write_dump(args.dump_tokens, "".join(f"{token}\n" for token in result.tokens))
+
+    if args.dump_ast and result.ast_json is not None:
+        write_dump(args.dump_ast, result.ast_json)
+
+    if args.dump_ir and result.ir is not None:
+        write_dump(args.dump_ir, result.ir)
+
+    reported = result.diagnostics.report()
+    result.close()
+    if not reported:
+        sys.exit(EXIT_CODES[result.failed_stage])
+
+    if args.verbose and args.fold and not result.from_cache and args.stop_after not in ("lex", "parse"):
+        print(f"Constant folding eliminated {result.eliminated} nodes")
+
+    if result.llvm_module is None:
+        return finish(args, profiler)
+
+    llvm_module = result.llvm_module
+    optimizer = pipeline.optimizer
+
+    if args.verbose:
+        optimizer.report()
+
+    if args.dump_opt_ir:
+        write_dump(args.dump_opt_ir, str(llvm_module))
+
+    if args.emit_obj or args.shared:
+        from AOT import AOT
+        aot = AOT(optimizer.speed_level, args.cpu, args.features)
+
+        # A shared library without --emit-obj is linked from a temporary object
+        object_path = args.emit_obj or args.shared + ".o"
+        with phase("emit object"):
+            aot.emit_object(llvm_module, object_path)
+
+        if args.shared:
+            try:
+                with phase("link"):
+                    aot.link_shared(object_path, args.shared)
+            except RuntimeError as e:
+                print(e)
+                sys.exit(4)
+            finally:
+                if not args.emit_obj:
+                    os.unlink(object_path)
+
+        if args.verbose:
+            for stage, seconds in aot.timings.items():
+                print(f"{stage:<10} {seconds * 1000:10.3f} ms")
+
+    if args.run:
+        from JIT import JIT
+        with phase("jit"):
+            jit = JIT(optimizer.target_machine, options.cache, (args.opt_level, args.cpu, args.features))
+            jit.load(llvm_module)
+        compile_time = time.perf_counter() - start_time
+
+        with phase("execute"):
+            return_value = jit.run()
+
+        print("===== RUN =====")
+        print(f"main returned {return_value}")
+        print(f"{'compile':<10} {compile_time * 1000:10.3f} ms (codegen {jit.timings['codegen'] * 1000:.3f} ms)")
+        print(f"{'execute':<10} {jit.timings['execute'] * 1000:10.3f} ms")
+        if options.cache is not None:
+            print(f"object cache: {jit.object_hits} hits, {jit.object_misses} misses")
+
+    profiler.add_pass_timings(optimizer.pass_timings)
+    finish(args, profiler)
+
+
+def compile_batch(args: argparse.Namespace, options: CompileOptions):
+    start = time.perf_counter()
+    reports = BatchCompiler(options, args.jobs, args.out_dir).compile(args.filenames)
+    print_report(reports, time.perf_counter() - start)
+
+    failed = [EXIT_CODES[file_report.failed_stage] for file_report in reports if file_report.failed_stage]
+    if failed:
+        sys.exit(max(failed))
+
+
+def finish(args: argparse.Namespace, profiler: PhaseProfiler):
+    if profiler.enabled:
+        write_dump(args.phase_output, profiler.dumps(args.phase_format))
 
-from Lexer import Lexer
-from Parser import Parser
-from Compiler import Compiler
 
-from llvmlite import ir
-import llvmlite.binding as llvm
-from ctypes import CFUNCTYPE, c_int, c_float
-
-LEXER_DEBUG = True
-PARSER_DEBUG = True
-COMPILER_DEBUG = True
-
-if len(sys.argv) != 2:
-    print("Usage: kitty <filename>")
-    sys.exit(1)
-
-filename = sys.argv[1]
-
-with open(filename) as f:
-    src = f.read()
-
-lexer = Lexer(src, path=filename)
-tokens = lexer.make_tokens()
-
-if LEXER_DEBUG:
-    print("===== SOURCE CODE =====")
-    print(src, "\n")
-
-    print("===== LEXER TOKENS =====")
-    for token in tokens:
-        print(token)
-    print()
-
-if not lexer.error_handler.report():
-    sys.exit(1)
-
-parser = Parser(tokens, lexer.error_handler)
-ast = parser.parse_program()
-
-if not parser.error_handler.report():
-    sys.exit(2)
-
-if PARSER_DEBUG:
-    with open("debug/ast.json", "w") as f:
-        json.dump(ast.json(), f, indent=4)
-
-c: Compiler = Compiler()
-c.compile(node=ast)
-
-module: ir.Module = c.module
-module.triple = llvm.get_default_triple()
-
-if COMPILER_DEBUG:
-    with open("debug/ir.ll", "w") as f:
-        f.write(str(module))
-        print("Successfully wrote IR to debug/ir.ll")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
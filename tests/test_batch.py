@@ -0,0 +1,29 @@
+import pytest
+
+from Batch import BatchCompiler
+from Pipeline import CompileOptions
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_unreadable_files_do_not_abort_the_batch(tmp_path, jobs):
+    good = tmp_path / "good.kitty"
+    good.write_text("1 + 2;\n")
+    broken = tmp_path / "broken.kitty"
+    broken.write_text("1 + ;\n")
+    binary = tmp_path / "binary.kitty"
+    binary.write_bytes(b"\xff\xfe\x00")
+    missing = tmp_path / "missing.kitty"
+
+    paths = [str(good), str(missing), str(binary), str(broken)]
+    reports = BatchCompiler(CompileOptions(stop_after="fold"), jobs).compile(paths)
+
+    assert [report.path for report in reports] == paths
+    assert [report.failed_stage for report in reports] == [None, "read", "read", "parse"]
+    assert reports[1].errors[0].startswith("Read Error: ") and "missing.kitty" in reports[1].errors[0]
+    assert reports[0].size == len("1 + 2;\n")
+
+
+@pytest.mark.parametrize("jobs", [0, -1, 1.0])
+def test_rejects_job_counts(jobs):
+    with pytest.raises(ValueError):
+        BatchCompiler(jobs=jobs)
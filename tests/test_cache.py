@@ -0,0 +1,43 @@
+import os
+
+from Cache import ArtifactCache
+
+
+def cache_size(directory) -> int:
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(directory) for name in names)
+
+
+def test_evicts_down_to_max_size(tmp_path):
+    cache = ArtifactCache(str(tmp_path), max_size=1000)
+    for i in range(20):
+        cache.put_all(cache.key(str(i), ()), {"ll": b"x" * 100})
+
+    assert cache_size(tmp_path) <= 1000
+    assert cache.size == cache_size(tmp_path)
+
+
+def test_scans_only_over_max_size(tmp_path, monkeypatch):
+    scans = []
+    scandir = os.scandir
+    monkeypatch.setattr(os, "scandir", lambda path: scans.append(path) or scandir(path))
+
+    cache = ArtifactCache(str(tmp_path), max_size=1000)
+    for i in range(9):
+        cache.put_all(cache.key(str(i), ()), {"ll": b"x" * 100})
+    assert scans.count(str(tmp_path)) == 1
+
+    cache.put_all(cache.key("9", ()), {"ll": b"x" * 200})
+    assert scans.count(str(tmp_path)) == 2
+
+
+def test_read_only_cache_still_hits(tmp_path, monkeypatch):
+    cache = ArtifactCache(str(tmp_path))
+    key = cache.key("1 + 2;", ())
+    cache.put_all(key, {"ll": b"ir"})
+
+    def utime(path, *args, **kwargs):
+        raise PermissionError(path)
+
+    monkeypatch.setattr(os, "utime", utime)
+    assert cache.get(key, "ll") == b"ir"
+    assert cache.hits == 1
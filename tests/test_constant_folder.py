@@ -0,0 +1,41 @@
+import pytest
+
+from AST import NodeFactory
+from Arena import ASTArena
+from ConstantFolder import ConstantFolder
+from Lexer import Lexer
+from Parser import Parser
+
+
+# (1 + 2) * 3 and 4 / 0, built without tokens as a tool generating code would
+def build(nodes):
+    program = nodes.program()
+    product = nodes.infix_expression(nodes.infix_expression(nodes.integer_literal(1), "+", nodes.integer_literal(2)),
+                                     "*", nodes.integer_literal(3))
+    nodes.add_statement(program, nodes.expression_statement(product))
+    nodes.add_statement(program, nodes.expression_statement(
+        nodes.infix_expression(nodes.integer_literal(4), "/", nodes.integer_literal(0))))
+    return program
+
+
+@pytest.mark.parametrize("nodes", [NodeFactory, ASTArena])
+def test_fold_without_tokens(nodes):
+    folder = ConstantFolder()
+    program = folder.fold(build(nodes()))
+
+    first, second = (statement["ExpressionStatement"]["expr"] for statement in program.json()["statements"])
+    assert first == {"type": "IntegerLiteral", "value": 9}
+    assert second["type"] == "InfixExpression"
+
+    [error] = folder.error_handler.errors
+    assert error.pos_start is None
+    assert str(error) == "Semantic Error: Division by zero\n"
+
+
+def test_division_by_zero_position():
+    tokens = Lexer("1;\n2 + 4 / 0;\n", "<test>").make_tokens()
+    folder = ConstantFolder()
+    folder.fold(Parser(tokens).parse_program())
+
+    [error] = folder.error_handler.errors
+    assert (error.pos_start.ln, error.pos_start.col) == (2, 7)
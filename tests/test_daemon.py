@@ -0,0 +1,25 @@
+import pytest
+
+from Daemon import CompileServer
+
+
+@pytest.fixture
+def server(tmp_path):
+    server = CompileServer(str(tmp_path / "daemon.sock"))
+    yield server
+    server.server_close()
+
+
+@pytest.mark.parametrize("options", [{"opt_level": "4"}, {"opt_level": 2}, {"opt_level": None},
+                                     {"fold": "no"}, {"cpu": 1}])
+def test_rejects_bad_options(server, options):
+    response = server.respond({"op": "compile", "source": "1 + 2;", **options})
+    assert not response["ok"]
+    assert response["error"].startswith("ValueError: ")
+    assert not server.pipelines
+
+
+def test_compiles(server):
+    response = server.respond({"op": "compile", "source": "1 + 2;", "opt_level": "s", "emit": ["ir"]})
+    assert response["ok"]
+    assert len(server.pipelines) == 1
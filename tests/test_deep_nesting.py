@@ -0,0 +1,55 @@
+import sys
+
+import pytest
+
+import json_writer
+from Lexer import Lexer
+from Parser import Parser
+from Arena import ASTArena
+from ConstantFolder import ConstantFolder
+from Compiler import Compiler
+
+DEPTH = 100_000
+
+# Each nests DEPTH InfixExpressions on one side
+SHAPES = {
+    "left": lambda n: "1" + "+1" * n + ";",
+    "paren": lambda n: "(" * n + "1" + "+1)" * n + ";",
+    "pow": lambda n: "2^" * n + "2;",
+}
+
+
+# Far below the depth of the trees, so any recursive walk left fails
+@pytest.fixture
+def low_recursion_limit():
+    limit = sys.getrecursionlimit()
+    sys.setrecursionlimit(200)
+    yield
+    sys.setrecursionlimit(limit)
+
+
+@pytest.mark.parametrize("arena", [False, True], ids=["nodes", "arena"])
+@pytest.mark.parametrize("shape", SHAPES)
+def test_deep_expression(shape, arena, low_recursion_limit):
+    tokens = Lexer(SHAPES[shape](DEPTH), "<test>").make_tokens()
+
+    def parse():
+        parser = Parser(tokens, nodes=ASTArena() if arena else None)
+        program = parser.parse_program()
+        assert not parser.error_handler.has_error
+        return program
+
+    program = parse()
+    assert json_writer.dumps(program.json(), indent=None).count('"InfixExpression"') == DEPTH
+
+    compiler = Compiler()
+    compiler.compile(program)
+    assert str(compiler.module)
+
+    folder = ConstantFolder()
+    folded = folder.fold(parse())
+    assert not folder.error_handler.has_error
+
+    compiler = Compiler()
+    compiler.compile(folded)
+    assert str(compiler.module)
@@ -0,0 +1,83 @@
+import random
+
+import pytest
+
+from Incremental import IncrementalDocument
+from Lexer import Lexer
+from Parser import Parser
+
+# What the random edits insert, including everything that changes where
+# statements and comments end
+EDIT_CHARS = "0123456789+-*/^();. \n#@"
+
+PROGRAMS = {
+    "statements": "".join(f"{i} + {i * 7 % 13} * ({i} - 2.5);  # statement {i}\n" for i in range(60)),
+    "errors": "1.2.3 + 4;\n5 + );\n(6 * 7;\n8 @ 9;\n10 + ;\n. 11;\n" * 10,
+    "trailing comment": "1 + 2;\n" * 20 + "3; # no newline",
+    "empty": "",
+}
+
+
+# Tokens, AST and diagnostics of a full re-lex and re-parse, as Pipeline
+# reports them with stop_after="parse"
+def full_parse(text: str) -> tuple:
+    lexer = Lexer(text, "<test>")
+    tokens = lexer.make_tokens()
+    parser = Parser(tokens)
+    program = parser.parse_program()
+
+    errors = lexer.error_handler.errors or parser.error_handler.errors
+    return ([(token.type, token.literal, token.start, token.end) for token in tokens], program.json(),
+            [str(error) for error in errors])
+
+
+def incremental(document: IncrementalDocument) -> tuple:
+    return ([(token.type, token.literal, token.start, token.end) for token in document.tokens()],
+            document.program().json(), [str(error) for error in document.diagnostics().errors])
+
+
+@pytest.mark.parametrize("typing", [False, True], ids=["random", "typing"])
+@pytest.mark.parametrize("name", PROGRAMS)
+def test_edits_match_full_parse(name, typing):
+    rng = random.Random(name)
+    document = IncrementalDocument(PROGRAMS[name], "<test>")
+    assert incremental(document) == full_parse(document.text)
+
+    cursor = len(document.text) // 2
+    for _ in range(300):
+        length = len(document.text)
+        if typing:
+            offset, removed, inserted = cursor, 0, rng.choice(EDIT_CHARS)
+            cursor += 1
+        elif length and rng.random() < 0.5:
+            offset, removed, inserted = rng.randrange(length), rng.randint(1, min(3, length)), ""
+            removed = min(removed, length - offset)
+        else:
+            offset, removed, inserted = rng.randint(0, length), 0, "".join(rng.choices(EDIT_CHARS, k=rng.randint(1, 3)))
+
+        document.edit(offset, removed, inserted)
+        assert incremental(document) == full_parse(document.text), (offset, removed, inserted)
+
+
+def test_reparses_only_the_edited_statement():
+    document = IncrementalDocument("1 + 2;\n" * 1000, "<test>")
+    statements = document.program().statements
+
+    relexed, reparsed = document.edit(7 * 500 + 4, 1, "3")
+    assert reparsed == 1 and relexed < 20
+
+    edited = document.program().statements
+    assert edited[500] is not statements[500]
+    assert all(edited[i] is statements[i] for i in range(1000) if i != 500)
+
+
+@pytest.mark.parametrize("offset, removed", [(-1, 0), (0, -3), (2, -3), (10, 0), (5, 5), (0, 10)])
+def test_rejects_edits_outside_the_text(offset, removed):
+    text = "1;\n2;\n3;"
+    document = IncrementalDocument(text, "<test>")
+
+    with pytest.raises(ValueError):
+        document.edit(offset, removed, "9")
+
+    assert document.text == text
+    assert incremental(document) == full_parse(text)
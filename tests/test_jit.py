@@ -0,0 +1,42 @@
+import os
+
+from Cache import ArtifactCache
+from JIT import JIT
+from Optimizer import create_target_machine
+from Pipeline import CompileOptions, Pipeline
+
+
+def cached_objects(directory: str) -> int:
+    return sum(name.endswith(".o") for _, _, names in os.walk(directory) for name in names)
+
+
+# Modules loaded one after another into the same engine are all named "main"
+# by Compiler, but each must get its own machine code
+def test_object_cache_keys_each_module(tmp_path):
+    cache = ArtifactCache(str(tmp_path))
+    # Unfolded and at -O0 the statements stay in main, so each source has its own IR
+    pipeline = Pipeline(CompileOptions(opt_level="0", fold=False))
+    modules = {source: pipeline.compile_source(source).llvm_module for source in ("1 + 2;", "3 * 4;")}
+    assert len({str(llvm_module) for llvm_module in modules.values()}) == 2
+
+    def new_jit():
+        return JIT(create_target_machine(pipeline.optimizer.speed_level), cache)
+
+    def run(jit, source: str) -> int:
+        llvm_module = pipeline.compile_source(source).llvm_module
+        jit.load(llvm_module)
+        try:
+            return jit.run()
+        finally:
+            jit.unload(llvm_module)
+
+    jit = new_jit()
+    assert jit.object_key(modules["1 + 2;"]) != jit.object_key(modules["3 * 4;"])
+
+    assert [run(jit, source) for source in ("1 + 2;", "3 * 4;", "1 + 2;")] == [69, 69, 69]
+    assert (jit.object_hits, jit.object_misses) == (1, 2)
+    assert cached_objects(tmp_path) == 2
+
+    jit = new_jit()
+    assert [run(jit, source) for source in ("3 * 4;", "1 + 2;")] == [69, 69]
+    assert (jit.object_hits, jit.object_misses) == (2, 0)
@@ -0,0 +1,60 @@
+import pytest
+
+from Batch import BatchCompiler
+from Lexer import Lexer, MappedLexer
+from Pipeline import CompileOptions, Pipeline
+
+PROGRAMS = {
+    "ascii": "1 + 2.5;\n@ 3;\n4 / 0;  # comment",
+    "non-ascii": "# ünïcode\n1 + 2;\n$ 3;\n",
+    "empty": "",
+}
+
+
+def tokens(lexer) -> list:
+    return [(token.type, token.literal, token.start, token.end, token.pos_start.ln, token.pos_start.col)
+            for token in lexer.make_tokens()]
+
+
+@pytest.mark.parametrize("name", PROGRAMS)
+def test_matches_lexer_and_closes(tmp_path, name):
+    path = tmp_path / "program.kitty"
+    path.write_text(PROGRAMS[name], encoding="utf-8")
+
+    lexer = Lexer(PROGRAMS[name], str(path))
+    expected = tokens(lexer), [str(error) for error in lexer.error_handler.errors]
+
+    with MappedLexer(str(path)) as mapped:
+        assert (tokens(mapped), [str(error) for error in mapped.error_handler.errors]) == expected
+
+    if name != "empty":
+        assert mapped.buffer.closed
+
+
+# Fold diagnostics are created from the mapped lines after lexing, so the map
+# is only released by CompileResult.close, after rendering
+def test_compile_result_close(tmp_path):
+    path = tmp_path / "program.kitty"
+    path.write_text("1 + 2;\n3 / 0;\n")
+
+    result = Pipeline(CompileOptions(stop_after="fold", mmap=True)).compile_file(str(path))
+    expected = Pipeline(CompileOptions(stop_after="fold")).compile_file(str(path))
+    assert result.failed_stage == expected.failed_stage == "fold"
+
+    rendered = [str(error) for error in result.diagnostics.errors]
+    result.close()
+    assert result.mapped_lexer.buffer.closed
+    assert rendered == [str(error) for error in expected.diagnostics.errors]
+    assert [str(error) for error in result.diagnostics.errors] == rendered
+
+
+def test_batch_closes_maps(tmp_path):
+    paths = []
+    for i, source in enumerate(("1 + 2;\n", "3 / 0;\n", "4 @ 5;\n")):
+        path = tmp_path / f"{i}.kitty"
+        path.write_text(source)
+        paths.append(str(path))
+
+    reports = BatchCompiler(CompileOptions(stop_after="fold", mmap=True), 1).compile(paths)
+    assert [report.failed_stage for report in reports] == [None, "fold", "lex"]
+    assert all(report.errors[0].startswith(("Semantic Error", "Lexical Error")) for report in reports[1:])
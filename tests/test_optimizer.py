@@ -0,0 +1,19 @@
+from Cache import ArtifactCache
+from Pipeline import CompileOptions, Pipeline
+
+
+# A cache hit only parses the optimized IR, so the pass timings of the
+# compilation before it must not be reported for it
+def test_timings_are_per_module(tmp_path):
+    options = CompileOptions(opt_level="2", cache=ArtifactCache(str(tmp_path)), time_passes=True)
+    Pipeline(options).compile_source("1 + 2;")
+
+    pipeline = Pipeline(options)
+    pipeline.compile_source("3 * 4;")
+    optimizer = pipeline.optimizer
+    assert list(optimizer.timings) == ["parse", "verify", "optimize"]
+    assert optimizer.pass_timings
+
+    assert pipeline.compile_source("1 + 2;").from_cache
+    assert list(optimizer.timings) == ["parse", "verify"]
+    assert optimizer.pass_timings == ""
@@ -0,0 +1,45 @@
+import pytest
+
+from Pipeline import CompileOptions
+from main import parse_args
+
+
+@pytest.mark.parametrize("flag", ["--lex-jobs", "--parse-jobs"])
+def test_job_counts(flag):
+    dest = flag[2:].replace("-", "_")
+    assert getattr(parse_args(["a.kitty"]), dest) == 1
+    assert getattr(parse_args(["a.kitty", flag, "3"]), dest) == 3
+    assert getattr(parse_args(["a.kitty", flag, "auto"]), dest) is None
+
+
+@pytest.mark.parametrize("value", ["0", "-1", "1.5", "", "many"])
+@pytest.mark.parametrize("flag", ["--lex-jobs", "--parse-jobs"])
+def test_job_counts_rejected(flag, value, capsys):
+    with pytest.raises(SystemExit):
+        parse_args(["a.kitty", flag, value])
+    assert "positive integer or auto" in capsys.readouterr().err
+
+
+@pytest.mark.parametrize("jobs", [0, -2, 1.0, "2", True])
+@pytest.mark.parametrize("name", ["lex_jobs", "parse_jobs"])
+def test_compile_options_reject_job_counts(name, jobs):
+    with pytest.raises(ValueError):
+        CompileOptions(**{name: jobs})
+
+
+def test_compile_options_job_counts():
+    options = CompileOptions(lex_jobs=None, parse_jobs=4)
+    assert (options.lex_jobs, options.parse_jobs) == (None, 4)
+
+
+def test_batch_job_counts(tmp_path):
+    assert parse_args([str(tmp_path)]).jobs is None
+    assert parse_args([str(tmp_path), "-j", "2"]).jobs == 2
+    assert parse_args([str(tmp_path), "-j", "auto"]).jobs is None
+
+
+@pytest.mark.parametrize("value", ["0", "-1", "1.5"])
+def test_batch_job_counts_rejected(tmp_path, value, capsys):
+    with pytest.raises(SystemExit):
+        parse_args([str(tmp_path), "-j", value])
+    assert "positive integer or auto" in capsys.readouterr().err
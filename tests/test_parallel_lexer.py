@@ -0,0 +1,54 @@
+import pytest
+
+import ParallelLexer
+from Lexer import Lexer
+
+PROGRAMS = {
+    "statements": "".join(f"{i} + {i * 7 % 13} * ({i} - 2.5);  # statement {i}\n" for i in range(200)),
+    "blank lines": "1;\n\n\n   \n2 ^ 3;\n\t\n" * 50,
+    "no trailing newline": "1 + 2;\n" * 100 + "3;",
+    "trailing comment": "1 + 2;\n" * 100 + "4; # no newline",
+    "comment only": "# nothing but a comment",
+    "empty": "",
+}
+
+
+@pytest.fixture(autouse=True)
+def always_parallel(monkeypatch):
+    monkeypatch.setattr(ParallelLexer, "MIN_PARALLEL_SIZE", 0)
+
+
+def lex_serial(program: str) -> tuple[list, list]:
+    lexer = Lexer(program, "<test>")
+    tokens = lexer.make_tokens()
+    return ([(token.type, token.literal, token.start, token.end) for token in tokens],
+            [str(error) for error in lexer.error_handler.errors])
+
+
+def lex_parallel(program: str, jobs: int) -> tuple[list, list]:
+    lexer = ParallelLexer.ParallelLexer(program, "<test>", jobs=jobs)
+    tokens = lexer.make_token_buffer()
+    return ([(token.type, token.literal, token.start, token.end) for token in tokens],
+            [str(error) for error in lexer.error_handler.errors])
+
+
+@pytest.mark.parametrize("jobs", [2, 3])
+@pytest.mark.parametrize("name", PROGRAMS)
+def test_matches_serial_lexer(name, jobs):
+    program = PROGRAMS[name]
+    assert lex_parallel(program, jobs) == lex_serial(program)
+
+
+# Every line starts with an error, so every chunk does too
+@pytest.mark.parametrize("jobs", [2, 3])
+def test_errors_at_chunk_boundaries(jobs):
+    lines = ["@ 1;", ". + 2;", "3.4.5 $ 6;", "7 + ;"]
+    program = "\n".join(lines[i % len(lines)] for i in range(400)) + "\n"
+
+    chunks = ParallelLexer.ParallelLexer(program, "<test>", jobs=jobs).chunks()
+    assert len(chunks) > 1
+    assert all(program[start - 1] == "\n" and program[start] in "@.37" for start, end in chunks[1:])
+
+    tokens, errors = lex_parallel(program, jobs)
+    assert errors
+    assert (tokens, errors) == lex_serial(program)
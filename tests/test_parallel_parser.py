@@ -0,0 +1,54 @@
+import pytest
+
+import ParallelParser
+from Lexer import Lexer
+from Parser import Parser
+
+# Statements span lines, so chunks are cut in the middle of a line and
+# between the lines of one statement
+PROGRAMS = {
+    "statements": "".join(f"{i} + {i * 7 % 13} *\n  ({i} - 2.5);  # statement {i}\n" for i in range(200)),
+    "syntax errors": "".join(["1 + ;\n", "(2 * 3;\n", ") 4;\n", "5 6\n;\n", "(((7 -\n 8;\n", "9 ^ 2; 10 +"][i % 6]
+                             for i in range(300)),
+    "unclosed parentheses": "(1 + (2;\n3 * 4);\n" * 100,
+    "no trailing semicolon": "1 + 2; " * 100 + "3 * 4",
+    "semicolons only": ";;\n;" * 100,
+    "empty": "",
+}
+
+
+@pytest.fixture(autouse=True)
+def always_parallel(monkeypatch):
+    monkeypatch.setattr(ParallelParser, "MIN_PARALLEL_TOKENS", 0)
+
+
+def parse_serial(program: str) -> tuple[str, list]:
+    parser = Parser(Lexer(program, "<test>").make_tokens())
+    ast = parser.parse_program()
+    return ast.json(), [str(error) for error in parser.error_handler.errors]
+
+
+def parse_parallel(program: str, jobs: int) -> tuple[str, list]:
+    parser = ParallelParser.ParallelParser(Lexer(program, "<test>").make_token_buffer(), jobs=jobs)
+    ast = parser.parse_program()
+    return ast.json(), [str(error) for error in parser.error_handler.errors]
+
+
+@pytest.mark.parametrize("jobs", [2, 3])
+@pytest.mark.parametrize("name", PROGRAMS)
+def test_matches_serial_parser(name, jobs):
+    program = PROGRAMS[name]
+    assert parse_parallel(program, jobs) == parse_serial(program)
+
+
+@pytest.mark.parametrize("jobs", [2, 3])
+def test_errors_in_every_chunk(jobs):
+    program = PROGRAMS["syntax errors"]
+    tokens = Lexer(program, "<test>").make_token_buffer()
+
+    chunks = ParallelParser.ParallelParser(tokens, jobs=jobs).chunks()
+    assert len(chunks) == jobs * 4
+
+    ast, errors = parse_parallel(program, jobs)
+    assert len(errors) > len(chunks)
+    assert (ast, errors) == parse_serial(program)
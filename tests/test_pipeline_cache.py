@@ -0,0 +1,55 @@
+import os
+
+from Cache import ArtifactCache
+from Pipeline import CompileOptions, compile_source
+
+SOURCE = "1 + 2 * 3;\n(4 - 5) / 2;\n"
+
+
+def cached_artifacts(directory: str) -> list[str]:
+    return sorted(name.split(".", 1)[1] for _, _, names in os.walk(directory) for name in names)
+
+
+def compile_cached(directory: str, **options):
+    return compile_source(SOURCE, CompileOptions(opt_level="2", cache=ArtifactCache(directory), **options))
+
+
+def test_no_ast_json_by_default(tmp_path):
+    result = compile_cached(tmp_path)
+    assert result.ok and not result.from_cache
+    assert result.ast_json is None
+    assert cached_artifacts(tmp_path) == ["ll", "opt.ll", "tokens"]
+
+    hit = compile_cached(tmp_path)
+    assert hit.from_cache
+    assert hit.ir == result.ir
+    assert [str(token) for token in hit.tokens] == [str(token) for token in result.tokens]
+
+
+def test_ast_json_cached_when_kept(tmp_path):
+    compile_cached(tmp_path)
+
+    # An entry without the JSON is a miss when it is asked for
+    result = compile_cached(tmp_path, keep_ast_json=True)
+    assert not result.from_cache
+    assert result.ast_json
+    assert cached_artifacts(tmp_path) == ["ast.json", "ll", "opt.ll", "tokens"]
+
+    hit = compile_cached(tmp_path, keep_ast_json=True)
+    assert hit.from_cache
+    assert hit.ast_json == result.ast_json
+
+
+def test_corrupt_tokens_are_a_miss(tmp_path):
+    result = compile_cached(tmp_path)
+
+    for root, _, names in os.walk(tmp_path):
+        for name in names:
+            if name.endswith(".tokens"):
+                with open(os.path.join(root, name), "wb") as f:
+                    f.write(b"\x80\x04K\x01.")
+
+    recompiled = compile_cached(tmp_path)
+    assert not recompiled.from_cache
+    assert recompiled.ir == result.ir
+    assert compile_cached(tmp_path).from_cache
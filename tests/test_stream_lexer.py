@@ -0,0 +1,69 @@
+import io
+
+import pytest
+
+from ConstantFolder import ConstantFolder
+from Lexer import Lexer, StreamLexer
+from Parser import Parser
+from Pipeline import CompileOptions, Pipeline
+
+PROGRAMS = {
+    "statements": "".join(f"{i} + {i * 7 % 13} * ({i} - 2.5);  # statement {i}\n" for i in range(40)),
+    "errors": "1.2.3 + 4;\n5 + );\n(6 * 7;\n8 @ 9;\n10 + ;\n. 11;\n" * 5,
+    "long line": "1 + 2 + 3 + 4 + 5 + 6 + 7 + 8 + 9 + 10;  # longer than a chunk\n2;\n",
+    "trailing comment": "1 + 2;\n" * 10 + "3; # no newline",
+    "no trailing newline": "1;\n2 $ 3;",
+    "empty": "",
+}
+
+
+def render(tokens, errors) -> tuple[list, list]:
+    return ([(token.type, token.literal, token.start, token.end, token.pos_start.ln, token.pos_start.col)
+             for token in tokens], [str(error) for error in errors])
+
+
+# Chunks far shorter than the lines, so tokens, comments and errors fall on
+# chunk boundaries
+@pytest.mark.parametrize("chunk_size", [1, 3, 7, 64])
+@pytest.mark.parametrize("name", PROGRAMS)
+def test_matches_lexer(name, chunk_size):
+    program = PROGRAMS[name]
+    lexer = Lexer(program, "<test>")
+    expected = render(lexer.make_tokens(), lexer.error_handler.errors)
+
+    stream = StreamLexer(io.StringIO(program), "<test>", chunk_size=chunk_size)
+    tokens = list(stream)
+    assert render(tokens, stream.error_handler.errors) == expected
+
+
+@pytest.mark.parametrize("source, failed_stage", [
+    ("8 @ 9;\n", "lex"),
+    ("1;\n8 @ 9;\n10 + ;\n", "lex"),
+    ("5 + );\n(6 * 7;\n", "parse"),
+    ("1 + 2;\n3 / 0;\n", "fold"),
+    ("1 + 2;\n", None),
+])
+def test_stream_reports_like_serial(tmp_path, source, failed_stage):
+    path = tmp_path / "program.kitty"
+    path.write_text(source)
+
+    results = [Pipeline(CompileOptions(stop_after="fold", stream=stream)).compile_file(str(path))
+               for stream in (False, True)]
+
+    assert [result.failed_stage for result in results] == [failed_stage, failed_stage]
+    serial, streamed = ([str(error) for error in result.diagnostics.errors] for result in results)
+    assert streamed == serial
+
+
+# ConstantFolder reports after the whole file is parsed, when only the last
+# segments are kept: earlier lines keep their position but lose the excerpt
+def test_diagnostics_on_dropped_lines():
+    program = "1 / 0;\n" + "2 + 3;\n" * 20 + "4 / 0;\n"
+    stream = StreamLexer(io.StringIO(program), "<test>", chunk_size=16)
+    folder = ConstantFolder()
+    folder.fold(Parser(stream).parse_program())
+
+    first, last = folder.error_handler.errors
+    assert (first.pos_start.ln, first.pos_start.col, last.pos_start.ln, last.pos_start.col) == (1, 3, 22, 3)
+    assert str(first) == "Semantic Error: Division by zero\nFile <test>, line 1, column 3\n"
+    assert str(last).endswith("4 / 0;\n  ^")
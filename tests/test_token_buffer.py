@@ -0,0 +1,51 @@
+import pickle
+
+import pytest
+
+from Lexer import Lexer
+from TokenBuffer import TokenBuffer
+
+PROGRAM = "1 + 2.5 * (3 - 4) ^ 1.0;\n@ 10 / 0;  # comment\n" * 20
+
+
+def columns(tokens: TokenBuffer) -> tuple:
+    return (tokens.types.tobytes(), tokens.starts.tobytes(), tokens.ends.tobytes(), tokens.literals.tobytes(),
+            tokens.literal_table)
+
+
+def test_round_trip():
+    tokens = Lexer(PROGRAM, "<test>").make_token_buffer()
+    loaded = TokenBuffer.loads(tokens.dumps(), tokens.source)
+
+    assert columns(loaded) == columns(tokens)
+    # 1 and 1.0 keep separate entries
+    assert [type(literal) for literal in loaded.literal_table] == [type(literal) for literal in tokens.literal_table]
+    assert [str(token) for token in loaded] == [str(token) for token in tokens]
+
+
+def test_round_trip_empty():
+    tokens = TokenBuffer()
+    assert columns(TokenBuffer.loads(tokens.dumps())) == columns(tokens)
+
+
+@pytest.mark.parametrize("corrupt", [
+    lambda data: data[:10],
+    lambda data: data[:-1],
+    lambda data: data + b" ",
+    # A literal table that is not a list of plain literals
+    lambda data: data.replace(b'[null, ', b'[{"a": 1}, '),
+    lambda data: pickle.dumps(("not", "tokens")),
+], ids=["truncated header", "truncated", "trailing", "table", "pickle"])
+def test_loads_rejects_corrupt_data(corrupt):
+    data = Lexer(PROGRAM, "<test>").make_token_buffer().dumps()
+    with pytest.raises(ValueError):
+        TokenBuffer.loads(corrupt(data))
+
+
+@pytest.mark.parametrize("column, code", [("types", 255), ("literals", 1000)])
+def test_loads_rejects_unknown_codes(column, code):
+    tokens = Lexer(PROGRAM, "<test>").make_token_buffer()
+    getattr(tokens, column)[0] = code
+
+    with pytest.raises(ValueError):
+        TokenBuffer.loads(tokens.dumps())